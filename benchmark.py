@@ -0,0 +1,352 @@
+"""Замеры производительности отдельных подсистем игры.
+Запуск: python benchmark.py <сценарий> (список сценариев - python benchmark.py --help)"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+import pygame
+from pygame.sprite import collide_mask, collide_rect
+
+import main  # Импорт main.py загружает все картинки и создаёт окно игры
+
+
+def timeit(function, repeats: int) -> float:
+    """Среднее время выполнения функции в миллисекундах"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def random_sprite(center: np.ndarray, spread: np.ndarray):
+    """Случайный астероид, пуля или звездолёт со случайным углом поворота рядом с точкой center"""
+    pos = center + np.random.uniform(-spread, spread, 2)
+    kind = random.choice(["asteroid", "bullet", "starship"])
+    if kind == "asteroid":
+        sprite = main.Asteroid(pos, np.zeros(2), random.choice(["small", "medium", "large"]))
+        sprite.angle_inc = random.uniform(0, 360)
+        sprite.rotate()
+        sprite.rect = sprite.image.get_rect(center=sprite.pos)
+    elif kind == "bullet":
+        sprite = main.Bullet(pos, pos + np.random.uniform(-100, 100, 2), main.BULLET_SPEED)
+    else:
+        sprite = main.Starship()
+        sprite.pos = pos
+        rotated = main.rotation_cache.get(sprite.original_image, random.uniform(0, 360))
+        sprite.image, sprite.mask = rotated.image, rotated.mask
+        sprite.rect = sprite.image.get_rect(center=sprite.pos)
+    return sprite
+
+
+def bench_masks(args):
+    """Пакетная проверка столкновений по маскам (batch_collide_masks) против collide_mask для каждой пары.
+    Кроме времени проверяет, что оба способа находят одни и те же столкновения. Объекты сначала собраны в
+    плотную кучу (много больших пересечений), затем разбросаны по всему экрану, как в игре"""
+    center = np.array(main.SCREEN_SIZE) / 2
+    for name, spread in (("dense", np.array([150, 150])), ("screen", center)):
+        sprites = [random_sprite(center, spread) for _ in range(args.objects)]
+        pairs = [(a, b) for a in sprites for b in sprites if a is not b and a.rect.colliderect(b.rect)]
+        expected = [collide_mask(a, b) is not None for a, b in pairs]
+        assert main.batch_collide_masks(pairs) == expected, "batch_collide_masks differs from collide_mask"
+        print(f"{name}: {len(pairs)} pairs with overlapping rects, {sum(expected)} collisions: results are identical")
+        print(f"  collide_mask:        {timeit(lambda: [collide_mask(a, b) for a, b in pairs], args.repeats):.3f} ms")
+        print(f"  batch_collide_masks: {timeit(lambda: main.batch_collide_masks(pairs), args.repeats):.3f} ms")
+
+
+def random_asteroids(n: int) -> list:
+    """n астероидов случайного размера в случайных точках экрана со случайной скоростью"""
+    asteroids = []
+    for _ in range(n):
+        pos = np.random.uniform((0, 0), main.SCREEN_SIZE)
+        asteroid = main.Asteroid(pos, np.random.uniform(-1, 1, 2), random.choice(["small", "medium", "large"]))
+        asteroids.append(asteroid)
+    return asteroids
+
+
+def bench_asteroid_physics(args):
+    """Упругие столкновения астероидов (Game.collide_asteroids) вместе с обычным обновлением астероидов"""
+    asteroids = pygame.sprite.Group(random_asteroids(args.objects))
+    game = SimpleNamespace(asteroids=asteroids)
+
+    def frame():
+        asteroids.update()
+        main.Game.collide_asteroids(game)
+
+    print(f"{args.objects} asteroids")
+    print(f"asteroids.update:        {timeit(asteroids.update, args.repeats):.3f} ms")
+    print(f"update + collisions:     {timeit(frame, args.repeats):.3f} ms (budget at 60 FPS: 16.667 ms)")
+
+
+def bench_explosions(args):
+    """Поиск целей взрывов: запрос к broadphase и одна векторная проверка радиусов (Game._explosion_targets)
+    против проверки хитбоксов каждой пары по отдельности. Взрывы находятся на разных кадрах анимации"""
+    categories = [("explosions", "asteroids"), ("explosions", "enemies")]
+    broadphase = main.SweepAndPrune(categories)
+    asteroids = main.TrackedGroup("asteroids", broadphase, random_asteroids(args.objects))
+    explosions = main.TrackedGroup("explosions", broadphase)
+    for _ in range(args.objects // 4):
+        explosion = main.ExplosionAnimation(np.random.uniform((0, 0), main.SCREEN_SIZE))
+        for _ in range(random.randrange(len(explosion.original_images))):
+            explosion.update()
+        explosions.add(explosion)
+    game = SimpleNamespace(explosions=explosions, area_categories=categories, broadphase=broadphase)
+    broadphase.sync()
+
+    def per_pair():
+        """Прежний способ: маска кадра строится заново, каждая пара проверяется collide_rect"""
+        for explosion in explosions:
+            explosion.mask = pygame.mask.from_surface(explosion.image)
+        return [(explosion, target) for explosion in explosions
+                for target in broadphase.candidates(explosion, "asteroids") if collide_rect(explosion, target)]
+
+    hits = sum(map(len, main.Game._explosion_targets(game).values()))
+    print(f"{len(explosions)} explosions, {len(asteroids)} asteroids: "
+          f"{len(per_pair())} hitbox hits, {hits} radius hits")
+    print(f"from_surface + collide_rect: {timeit(per_pair, args.repeats):.3f} ms")
+    print(f"_explosion_targets:          {timeit(lambda: main.Game._explosion_targets(game), args.repeats):.3f} ms")
+
+
+def bench_blit(args):
+    """Отрисовка картинок в формате файла (как они загружаются pygame.image.load), в формате дисплея отдельными
+    поверхностями и подповерхностями атласа текстур (как их загружает load_image при TEXTURE_ATLAS = True).
+    Рисуется args.objects случайных картинок игры: без поворота (как атлас) и повёрнутых через rotation_cache"""
+    screen = main.game_screen
+    sprites = [path for path in main.loaded_images if path != os.path.join("images", "background.png")]
+    paths = random.choices(sprites, k=args.objects)
+    angles = [random.uniform(0, 360) for _ in paths]
+    positions = [tuple(np.random.uniform((0, 0), main.SCREEN_SIZE)) for _ in paths]
+    raw_images = {path: pygame.image.load(path) for path in sprites}
+    converted_images = {path: image.convert_alpha() for path, image in raw_images.items()}
+    atlas = main.TextureAtlas(enabled=True)
+    atlas_images = {path: atlas.add(path, image) for path, image in converted_images.items()}
+    for name, images in (("file format", raw_images), ("display format", converted_images),
+                         ("texture atlas", atlas_images)):
+        originals = [images[path] for path in paths]
+        rotated = [main.rotation_cache.get(images[path], angle).image for path, angle in zip(paths, angles)]
+        same_format = all((image.get_bitsize(), image.get_shifts()[:3]) ==
+                          (screen.get_bitsize(), screen.get_shifts()[:3]) for image in rotated)
+        original_time = timeit(lambda: screen.blits(list(zip(originals, positions)), False), args.repeats)
+        rotated_time = timeit(lambda: screen.blits(list(zip(rotated, positions)), False), args.repeats)
+        print(f"{name:15} {original_time:.3f} ms per frame, rotated {rotated_time:.3f} ms, "
+              f"rotated images match the display: {same_format}")
+
+
+def bench_draw(args):
+    """Отрисовка кадра одним вызовом Surface.blits с полосами здоровья в том же списке (как в Game.draw) против
+    вызова Group.draw для каждой группы и pygame.draw.rect для каждой полосы здоровья. Рисуется args.objects
+    астероидов и args.objects / 10 врагов, а затем args.objects врагов (у каждого своя полоса здоровья)"""
+    screen = main.game_screen
+    player = pygame.sprite.RenderPlain(main.Starship())
+    game = SimpleNamespace(screen=screen, renderer=main.FullRenderer(), background=None, trails=None)
+    for n_asteroids, n_enemies in ((args.objects, args.objects // 10), (0, args.objects)):
+        asteroids = pygame.sprite.RenderPlain(random_asteroids(n_asteroids))
+        enemies = pygame.sprite.RenderPlain()
+        for _ in range(n_enemies):
+            enemy = main.Enemy()
+            enemy.pos = np.random.uniform((0, 0), main.SCREEN_SIZE)
+            enemy.rect = enemy.image.get_rect(center=enemy.pos, width=enemy.w, height=enemy.h)
+            enemies.add(enemy)
+
+        def per_group():
+            screen.fill(main.BG_COLOR)
+            for group in (player, asteroids, enemies):
+                group.draw(screen)
+            for enemy in enemies:
+                width = (enemy.w + 10) / enemy.max_hp * enemy.hp
+                pygame.draw.rect(screen, (200, 0, 0), [*enemy.rect.topleft, width, 5])
+            starship = player.sprites()[0]
+            pygame.draw.rect(screen, (0, 200, 0), [*starship.rect.topleft, starship.original_image.get_width() + 10, 5])
+
+        def single_blits():
+            screen.fill(main.BG_COLOR)
+            blit_sequence = [(sprite.image, sprite.rect) for group in (player, asteroids, enemies) for sprite in group]
+            blit_sequence += [enemy.health_bar() for enemy in enemies]
+            blit_sequence += [sprite.health_bar() for sprite in player]
+            screen.blits(blit_sequence, doreturn=False)
+
+        print(f"{len(asteroids)} asteroids, {len(enemies)} enemies")
+        print(f"  Group.draw + draw.rect: {timeit(per_group, args.repeats):.3f} ms")
+        print(f"  single Surface.blits:   {timeit(single_blits, args.repeats):.3f} ms")
+        game_draw = timeit(lambda: main.Game.draw(game, player, [asteroids], enemies), args.repeats)
+        print(f"  Game.draw (+ culling):  {game_draw:.3f} ms")
+
+
+def bench_background(args):
+    """Отрисовка параллакс-фона (ParallaxBackground.draw) против однотонной заливки и масштабирования картинки фона
+    каждый кадр и сборкой слоёв в отдельный кадр фона с его копированием на экран. Сдвинувшийся фон выводится
+    целиком, поэтому показано и время вывода всего кадра на дисплей.
+    Пока фон стоит на месте, DirtyRectRenderer восстанавливает его только в args.objects областях спрайтов"""
+    screen = main.game_screen
+    background = main.ParallaxBackground()
+    speed = np.random.uniform(-10, 10, 2)
+    rects = [pygame.Rect(*np.random.uniform((0, 0), main.SCREEN_SIZE), 64, 64) for _ in range(args.objects)]
+
+    def parallax():
+        background.update(speed)
+        background.draw(screen)
+
+    def copy_frame():  # Сборка в отдельный кадр фона и его копирование на экран
+        background.update(speed)
+        background.compose(background.frame)
+        screen.blit(background.frame, (0, 0))
+
+    def static():
+        background.update(np.zeros(2))
+        background.draw(screen, rects)
+
+    background.draw(screen)  # Плитки с RLEACCEL кодируются при первой отрисовке, это не должно попасть в замеры
+    print(f"{len(background.layers)} layers, screen {main.SCREEN_SIZE[0]}x{main.SCREEN_SIZE[1]}")
+    print(f"screen.fill:               {timeit(lambda: screen.fill(main.BG_COLOR), args.repeats):.3f} ms")
+    print(f"ParallaxBackground:        {timeit(parallax, args.repeats):.3f} ms")
+    print(f"compose + copy of frame:   {timeit(copy_frame, args.repeats):.3f} ms")
+    print(f"static, {len(rects)} dirty rects: {timeit(static, args.repeats):.3f} ms")
+    scale_time = timeit(lambda: pygame.transform.scale(background.image, main.SCREEN_SIZE, screen), args.repeats)
+    print(f"transform.scale per frame: {scale_time:.3f} ms")
+    print(f"full display update:       {timeit(main.present_frame, args.repeats):.3f} ms")
+
+
+def bench_particles(args):
+    """Обновление и отрисовка args.objects * 50 частиц (ParticleSystem) против отрисовки каждой частицы отдельным
+    вызовом screen.fill. Частицы постоянно появляются заново, поэтому их количество не уменьшается"""
+    screen = main.game_screen
+    system = main.ParticleSystem(args.objects * 50)
+    centers = np.random.uniform((0, 0), main.SCREEN_SIZE, (args.objects, 2))
+
+    def emit():
+        for center in centers:
+            system.emit(center, 50, speed=(0.5, 5), life=(1000, 2000), color=(255, 180, 60))
+
+    def per_particle():
+        for (x, y), color in zip(system.pos[:system.count].tolist(), system.color[:system.count].tolist()):
+            screen.fill(color, (x, y, 2, 2))
+
+    emit()
+    print(f"{system.count} particles")
+    print(f"ParticleSystem.update:    {timeit(lambda: (system.update(), emit()), args.repeats):.3f} ms")
+    print(f"ParticleSystem.draw:      {timeit(lambda: system.draw(screen), args.repeats):.3f} ms")
+    print(f"screen.fill per particle: {timeit(per_particle, args.repeats):.3f} ms")
+
+
+def bench_trails(args):
+    """Запись и отрисовка следов (TrailPool) для args.objects пуль, летящих в случайных направлениях. Сначала пули,
+    улетевшие за экран, уничтожаются, а вместо них в центре появляются новые, поэтому строки буфера постоянно
+    освобождаются и занимаются снова. Затем набор пуль не меняется, и проверяется, что update и draw не выделяют
+    память под временные массивы и списки (пиковый объём по tracemalloc не зависит от количества пуль)"""
+    screen = main.game_screen
+    center = np.array(main.SCREEN_SIZE) / 2
+
+    def new_bullet():
+        return main.Bullet(center.copy(), center + np.random.uniform(-100, 100, 2), main.BULLET_SPEED)
+
+    bullets = pygame.sprite.Group([new_bullet() for _ in range(args.objects)])
+    trails = main.TrailPool()
+    groups = {bullets: (200, 200, 160)}
+    replaced = 0
+
+    def move(respawn: bool):
+        nonlocal replaced
+        for bullet in bullets.sprites():
+            bullet.move()
+            if respawn and not main.viewport.collidepoint(*bullet.pos):
+                bullet.kill()
+                bullets.add(new_bullet())
+                replaced += 1
+
+    for _ in range(args.repeats):
+        move(respawn=True)
+        trails.update(groups)
+        trails.draw(screen)
+    # Строки уничтоженных пуль должны вернуться в пул: все занятые строки принадлежат живым пулям
+    # (при переполнении пула часть новых пуль остаётся без следа)
+    owners = [owner for owner in trails.owners if owner is not None]
+    assert all(owner.alive() for owner in owners), "TrailPool leaks slots of killed sprites"
+    assert trails.n_free == len(trails.owners) - len(owners), "TrailPool free stack is out of sync"
+    print(f"{len(bullets)} bullets, trail length {trails.length}, {trails.n_free} free slots, "
+          f"{replaced} bullets replaced over {args.repeats} frames")
+    # Пули, которым при переполнении пула не хватило строки, занимают освободившиеся строки в первом же кадре
+    move(respawn=False)
+    trails.update(groups)
+    peaks = {"update": 0, "draw": 0}  # Пиковый объём памяти, выделенной за один вызов (включая сразу освобождённую)
+    tracemalloc.start()
+    for _ in range(args.repeats):
+        move(respawn=False)
+        for name, call, argument in (("update", trails.update, groups), ("draw", trails.draw, screen)):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            call(argument)
+            peaks[name] = max(peaks[name], tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    print(f"peak allocation per frame: update {peaks['update']} bytes, draw {peaks['draw']} bytes")
+    # Временный массив или список на все пули занял бы не меньше 8 байт на каждую из них
+    assert max(peaks.values()) < 4096, "TrailPool allocates per-bullet temporaries"
+    print(f"TrailPool.update: {timeit(lambda: trails.update(groups), args.repeats):.3f} ms")
+    print(f"TrailPool.draw:   {timeit(lambda: trails.draw(screen), args.repeats):.3f} ms")
+
+
+def bench_radar(args):
+    """Обновление радара (Radar.refresh) по args.objects астероидам, врагам и бустерам на поле и за его границами
+    и вывод готовой картинки радара на экран. Радар обновляется раз в RADAR_PERIOD кадров, а выводится каждый кадр"""
+    screen = main.game_screen
+    radar = main.Radar()
+    groups = {pygame.sprite.Group(): color for color in ((150, 150, 150), (255, 60, 60), (255, 255, 0))}
+    for i in range(args.objects):
+        sprite = pygame.sprite.Sprite()
+        sprite.pos = np.random.uniform((-radar.margin, -radar.margin), np.add(main.SCREEN_SIZE, radar.margin))
+        list(groups)[i % len(groups)].add(sprite)
+    refresh_time = timeit(lambda: radar.refresh(groups), args.repeats)
+    blit_time = timeit(lambda: screen.blit(radar.surface, (5, 5)), args.repeats)
+    print(f"{sum(map(len, groups))} entities, refresh every {radar.period} frames")
+    print(f"Radar.refresh:  {refresh_time:.3f} ms")
+    print(f"blit:           {blit_time:.3f} ms")
+    print(f"per frame:      {refresh_time / radar.period + blit_time:.3f} ms (budget 0.3 ms)")
+
+
+def bench_glow(args):
+    """Отрисовка args.objects пуль и взрывов без свечения и вместе с ореолами из GlowCache (BLEND_ADD).
+    Отдельно показано время построения всех ореолов, которое тратится только 1 раз"""
+    screen = main.game_screen
+    sprites = []
+    for _ in range(args.objects):
+        pos = np.random.uniform((0, 0), main.SCREEN_SIZE)
+        if random.random() < 0.75:
+            sprite = main.Bullet(pos, pos + np.random.uniform(-100, 100, 2), main.BULLET_SPEED,
+                                 type_=random.choice(["normal", "explosive"]))
+        else:
+            sprite = main.ExplosionAnimation(pos)
+            for _ in range(random.randrange(len(sprite.original_images))):
+                sprite.update()
+        sprites.append(sprite)
+    glow_cache = main.GlowCache()
+    start = time.perf_counter()
+    glows = [glow_cache.blit_item(sprite) for sprite in sprites]
+    build_time = (time.perf_counter() - start) * 1000
+    plain = [(sprite.image, sprite.rect) for sprite in sprites]
+    print(f"{len(sprites)} objects, {len(glow_cache.cache)} different glows built once in {build_time:.3f} ms")
+    print(f"without glow: {timeit(lambda: screen.blits(plain, False), args.repeats):.3f} ms")
+    print(f"with glow:    {timeit(lambda: screen.blits(plain + glows, False), args.repeats):.3f} ms")
+
+
+scenarios = {"blit": bench_blit,
+             "masks": bench_masks,
+             "draw": bench_draw,
+             "asteroid-physics": bench_asteroid_physics,
+             "explosions": bench_explosions,
+             "background": bench_background,
+             "particles": bench_particles,
+             "trails": bench_trails,
+             "radar": bench_radar,
+             "glow": bench_glow}
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("scenario", type=str, choices=scenarios)
+parser.add_argument("--objects", "-n", type=int, default=200, help="Количество объектов в сценарии")
+parser.add_argument("--repeats", "-r", type=int, default=50, help="Количество повторов замера")
+parser.add_argument("--seed", type=int, default=0)
+args = parser.parse_args()
+random.seed(args.seed)
+np.random.seed(args.seed)
+scenarios[args.scenario](args)
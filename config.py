@@ -1,6 +1,74 @@
 ### Общие настройки игры
 MAX_FPS = 60               # Максимальное кол-во кадров в секунду
 SCREEN_SIZE = (1000, 600)       # Размер окна игры в пикселях (0, 0) - полный экран
+DEBUG = False              # Отображение хитбоксов и статистики производительности
+
+### Настройки производительности
+
+## Настройки обработки столкновений
+# Алгоритм поиска пар кандидатов на столкновение: "grid" - равномерная сетка, перестраиваемая каждый кадр,
+# "sweep" - отсортированный по оси x список (sweep and prune), обновляемый между кадрами
+COLLISION_BROADPHASE = "sweep"
+SWEPT_COLLISIONS = True    # Проверять столкновения пуль вдоль всего пути за кадр (пули не пролетают сквозь цели)
+# Форма объектов при точной проверке столкновений: "mask" - попиксельно (точно, но медленно), "polygon" - выпуклый
+# многоугольник, "circle" - окружность (быстрее всего), "rect" - хитбокс. Для пары используется менее точная форма,
+# только окружность с хитбоксом или многоугольником проверяются точно
+COLLISION_SHAPES = {"asteroid": "mask", "bullet": "mask", "starship": "mask", "enemy": "rect"}
+# Проверять все пары с формой "mask" одной векторной операцией numpy вместо вызова collide_mask для каждой пары.
+# Результат тот же (это проверяет python benchmark.py masks), но пока в 2-3 раза медленнее вызовов collide_mask
+BATCHED_MASK_COLLISIONS = False
+COLLISION_CELL_SIZE = 128  # Размер ячейки сетки для поиска пар кандидатов на столкновение (в пикселях)
+
+## Настройки отрисовки
+# Способ вывода кадра на экран: "full" - каждый кадр экран очищается и выводится целиком,
+# "dirty" - очищаются и выводятся только области, изменившиеся с прошлого кадра
+RENDERER = "dirty"
+# Размер кадра, в который рисуется игра, например (1000, 600). Готовый кадр 1 раз за кадр масштабируется до размера
+# окна, поэтому в полноэкранном режиме на мониторе с большим разрешением рисуется намного меньше пикселей.
+# None - игра рисуется прямо в окно, а игровое поле меняет размер вместе с окном
+RENDER_RESOLUTION = None
+# Упаковывать картинки в общие большие поверхности (атлас текстур). Повёрнутые картинки всё равно хранятся
+# отдельно, а неповёрнутые подповерхности рисуются немного медленнее (см. python benchmark.py blit)
+TEXTURE_ATLAS = False
+ROTATION_STEP = 3          # Шаг угла поворота картинок в градусах (меньше - плавнее вращение, но больше памяти)
+CULL_OFFSCREEN_ROTATION = True  # Не поворачивать картинки астероидов и врагов, пока они за пределами экрана
+# Звёздный фон из images/background.png со слоями, сдвигающимися вслед за игроком. В кадрах, где слои сдвинулись,
+# "dirty" выводит кадр целиком, а игрок почти всегда в движении (см. python benchmark.py background).
+# False - однотонный фон BG_COLOR
+PARALLAX_BACKGROUND = False
+# Слои фона от дальнего к ближнему: (масштаб картинки, доля скорости игрока, с которой сдвигается слой)
+BACKGROUND_LAYERS = [(1, 0.05), (2, 0.2)]
+PARTICLE_BUDGET = 20000    # Максимальное количество частиц (искр и пыли) одновременно. 0 - без частиц
+EXPLOSION_SPARKS = 150     # Количество искр при взрыве пули
+ASTEROID_DUST = {"small": 20, "medium": 40, "large": 80}  # Количество частиц пыли при разрушении астероидов
+TRAILS = True              # Следы за игроком и пулями
+TRAIL_LENGTH = 8           # Длина следа (количество последних положений объекта)
+TRAIL_CAPACITY = 2048      # Максимальное количество следов одновременно (память под них выделяется заранее)
+RADAR = True               # Радар с объектами на поле и за его границами
+RADAR_SIZE = (140, 100)    # Размер радара в пикселях
+RADAR_PERIOD = 6           # Радар обновляется раз в столько кадров
+RADAR_MARGIN = 200         # Ширина полосы за границами поля, которую показывает радар (в пикселях)
+# Свечение пуль и взрывов: к экрану прибавляются заранее размытые копии их картинок (см. python benchmark.py glow)
+GLOW = True
+GLOW_RADIUS = 12           # Ширина ореола свечения в пикселях
+GLOW_INTENSITY = 2         # Яркость ореола (во сколько раз он ярче размытой картинки)
+
+## Адаптивное качество
+# Если среднее время кадра (без ожидания ограничителя FPS) за последние QUALITY_WINDOW кадров больше бюджета кадра
+# 1 / MAX_FPS, качество понижается на 1 ступень, а если меньше QUALITY_HEADROOM бюджета - повышается обратно.
+# После смены ступени окно набирается заново, поэтому ступени не переключаются каждый кадр
+ADAPTIVE_QUALITY = True
+QUALITY_WINDOW = 60
+QUALITY_HEADROOM = 0.6
+# Ступени качества от лучшей к худшей: шаг угла поворота картинок, максимальное количество частиц, вращение
+# астероидов, параллакс-фон, свечение пуль и взрывов и формы объектов при проверке столкновений
+QUALITY_TIERS = [{"rotation_step": ROTATION_STEP, "particle_budget": PARTICLE_BUDGET, "asteroid_spin": True,
+                  "background": True, "glow": True, "collision_shapes": COLLISION_SHAPES},
+                 {"rotation_step": 6, "particle_budget": PARTICLE_BUDGET // 4, "asteroid_spin": True,
+                  "background": False, "glow": True, "collision_shapes": {**COLLISION_SHAPES, "asteroid": "polygon"}},
+                 {"rotation_step": 10, "particle_budget": PARTICLE_BUDGET // 20, "asteroid_spin": False,
+                  "background": False, "glow": False, "collision_shapes": {"asteroid": "circle", "bullet": "circle",
+                                                                          "starship": "circle", "enemy": "rect"}}]
 
 ### Настройки игрового процесса
 
@@ -8,6 +76,7 @@ SCREEN_SIZE = (1000, 600)       # Размер окна игры в пиксел
 MAX_HP = 5                     # Максимальное количество очков здоровья у игрока
 INVULNERABILITY_PERIOD = 0.3   # Время (в секундах) неуязвимости после попадания
 BASE_DAMAGE = 1                # Базовый урон пули
+EXPLOSION_DAMAGE = 1 / 16      # Урон взрыва врагу за каждый кадр контакта
 
 ## Настройки перемещения
 SHIP_SPEED = 40            # Скорость звездолёта (чем больше, тем медленнее)
@@ -28,6 +97,8 @@ ASTEROID_SPEED = 300       # Скорость астероида (чем бол
 MEDIUM_FRAGMENTS = 2       # Количество фрагментов при разрушении большого астероида
 SMALL_FRAGMENTS = 3        # Количество фрагментов при разрушении среднего астероида
 FRAGMENTS_SPEED = 0.5      # Скорость осколков астероидов (чем больше, тем быстрее)
+ASTEROID_PHYSICS = False   # Астероиды отскакивают друг от друга (упругие столкновения)
+ASTEROID_MASSES = {"small": 1, "medium": 2, "large": 4}  # Массы астероидов каждого размера в режиме физики
 
 ## Настройки бустеров
 BOOSTER_SPAWN_RATE = 400   # Частота появления бустеров (чем меньше, тем чаще)
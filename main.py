@@ -4,12 +4,13 @@ import random  # Модуль random нужен для генерации слу
 import sys  # Модуль sys понадобится нам для закрытия игры
 import time  # Модуль time нужен для замера времени
 from dataclasses import dataclass
+from collections import deque
 from itertools import cycle
-from typing import Tuple, List, Union, Dict
+from typing import Tuple, List, Union, Dict, Callable, Any
 
 import numpy as np  # Модуль numpy нужен для поэлементного сложения векторов
 import pygame  # Модуль pygame для реализации игровой логики
-from pygame.sprite import RenderPlain, Sprite, spritecollide, collide_mask
+from pygame.sprite import RenderPlain, Sprite, spritecollide
 
 from config import *  # Настройки для большинства игровых механик
 
@@ -19,12 +20,60 @@ pygame.mixer.init()
 # Цвет фона в формате RGB (красный, синий, зелёный). (0, 0, 0) - чёрный цвет.
 BG_COLOR = (0, 0, 0)
 # Объект дисплея (0, 0) - полный экран, если задать (800, 600), то окно будет размером 800х600 пикселей
-game_screen = pygame.display.set_mode(SCREEN_SIZE, pygame.RESIZABLE)
+game_window = pygame.display.set_mode(SCREEN_SIZE, pygame.RESIZABLE)
+# Поверхность, в которую рисуется игра: само окно или кадр внутреннего разрешения, масштабируемый до размера окна
+game_screen = game_window if RENDER_RESOLUTION is None else pygame.Surface(RENDER_RESOLUTION).convert()
 # Получим ширину и высоту игрового поля из объекта screen и сохраним в глобальную переменную.
 # Мы будем использовать SCREEN_SIZE очень часто!
 SCREEN_SIZE = game_screen.get_size()
 
 
+class TextureAtlas:
+    """Атлас текстур: картинки копируются в несколько больших поверхностей (страниц), а игровые объекты используют
+    их подповерхности. Картинки раскладываются по страницам рядами (полками) в порядке добавления.
+    Манифест хранит для каждой картинки номер страницы и её область на странице"""
+
+    def __init__(self, page_size: Tuple[int, int] = (1024, 1024), enabled: bool = TEXTURE_ATLAS):
+        self.page_size = page_size
+        self.enabled = enabled  # Если атлас отключён, картинки используются как есть
+        self.pages = []  # Страницы атласа
+        self.manifest = {}  # Словарь вида ключ картинки -> (номер страницы, область на странице)
+        self.x = self.y = 0  # Место для следующей картинки на последней странице
+        self.shelf_height = 0  # Высота текущего ряда картинок
+
+    def add(self, key: str, image: pygame.Surface) -> pygame.Surface:
+        """Копирует картинку в атлас и возвращает её подповерхность. Картинки больше страницы остаются отдельными"""
+        width, height = image.get_size()
+        if not self.enabled or width > self.page_size[0] or height > self.page_size[1]:
+            return image
+        if self.x + width > self.page_size[0]:  # Ряд заполнен - начинаем следующий
+            self.x, self.y, self.shelf_height = 0, self.y + self.shelf_height, 0
+        if not self.pages or self.y + height > self.page_size[1]:  # Страница заполнена - начинаем новую
+            self.pages.append(pygame.Surface(self.page_size, pygame.SRCALPHA).convert_alpha())
+            self.x = self.y = self.shelf_height = 0
+        rect = pygame.Rect(self.x, self.y, width, height)
+        page = self.pages[-1]
+        # Страница изначально прозрачная, поэтому BLEND_RGBA_MAX копирует пиксели вместе с прозрачностью без смешивания
+        page.blit(image, rect, special_flags=pygame.BLEND_RGBA_MAX)
+        self.manifest[key] = (len(self.pages) - 1, rect)
+        self.x += width
+        self.shelf_height = max(self.shelf_height, height)
+        return page.subsurface(rect)
+
+
+texture_atlas = TextureAtlas()  # Общий атлас всех картинок игры
+loaded_images = {}  # Все загруженные картинки игры: путь к файлу -> картинка в формате дисплея
+
+
+def load_image(path: str) -> pygame.Surface:
+    """Загрузка картинки с переводом в формат дисплея (с сохранением прозрачности). Без этого pygame преобразует
+    пиксели из формата файла при каждой отрисовке. Каждый файл загружается только 1 раз и помещается в атлас"""
+    image = loaded_images.get(path)
+    if image is None:
+        image = loaded_images[path] = texture_atlas.add(path, pygame.image.load(path).convert_alpha())
+    return image
+
+
 @dataclass
 class Weapon:
     type: str
@@ -40,12 +89,1091 @@ class Ability:
     sound: pygame.mixer.Sound
 
 
+def collision_rect(sprite: Sprite) -> pygame.Rect:
+    """Прямоугольник объекта для поиска пар кандидатов. У пуль он охватывает весь путь, пройденный за последний кадр.
+    Объекты, которые проверяются не по хитбоксу, а по картинке (маской, многоугольником или окружностью), занимают
+    прямоугольник всей картинки. Пара с объектом формы "circle" проверяется окружностями, поэтому пока такие объекты
+    есть, прямоугольник охватывает и окружность объекта"""
+    shape = collision_shapes.get(getattr(sprite, "entity_type", None), "rect")
+    swept_rect = getattr(sprite, "swept_rect", None)
+    if shape == "rect":
+        return sprite.rect if swept_rect is None else swept_rect
+    rect = sprite.image.get_rect(topleft=sprite.rect.topleft) if swept_rect is None else swept_rect
+    if "circle" in collision_shapes.values():
+        diameter = math.ceil(2 * polygon_cache.radius(sprite.original_image)) + 1  # +1 на округление координат
+        width, height = sprite.image.get_size()
+        rect = rect.inflate(max(diameter - width, 0), max(diameter - height, 0))
+    return rect
+
+
+class SpatialHash:
+    """Равномерная сетка для быстрого отбора пар объектов, которые могут столкнуться (broadphase).
+    Каждый объект попадает во все ячейки, которые пересекает его хитбокс. Точная (и дорогая) проверка столкновения
+    выполняется только для объектов, оказавшихся хотя бы в одной общей ячейке. Сетка перестраивается каждый кадр"""
+
+    def __init__(self, cell_size: int = COLLISION_CELL_SIZE):
+        self.cell_size = cell_size
+        self.sprites = {}  # Все отслеживаемые объекты и их слои (например, "asteroids")
+        self.cells = {}  # Словарь вида (слой, x ячейки, y ячейки) -> список объектов
+
+    def _cell_range(self, rect: pygame.Rect):
+        """Перебор координат всех ячеек, которые пересекает прямоугольник rect"""
+        x_start, x_end = rect.left // self.cell_size, rect.right // self.cell_size
+        y_start, y_end = rect.top // self.cell_size, rect.bottom // self.cell_size
+        for cell_x in range(x_start, x_end + 1):
+            for cell_y in range(y_start, y_end + 1):
+                yield cell_x, cell_y
+
+    def add(self, sprite: Sprite, layer: str):
+        """Начать отслеживание объекта. В ячейки он попадёт при следующем вызове sync"""
+        self.sprites[sprite] = layer
+
+    def remove(self, sprite: Sprite):
+        self.sprites.pop(sprite, None)
+
+    def insert(self, sprite: Sprite, layer: str):
+        """Добавление объекта в ячейки слоя layer"""
+        for cell_x, cell_y in self._cell_range(collision_rect(sprite)):
+            self.cells.setdefault((layer, cell_x, cell_y), []).append(sprite)
+
+    def sync(self):
+        """Перестроение сетки по текущим хитбоксам объектов. Вызывается 1 раз за кадр"""
+        self.cells.clear()
+        for sprite, layer in self.sprites.items():
+            self.insert(sprite, layer)
+
+    def query(self, rect: pygame.Rect, layer: str) -> List[Sprite]:
+        """Возвращает объекты слоя layer, находящиеся в тех же ячейках, что и rect (без повторов)"""
+        candidates = {}  # Словарь используется как упорядоченное множество
+        for cell_x, cell_y in self._cell_range(rect):
+            for sprite in self.cells.get((layer, cell_x, cell_y), ()):
+                candidates[sprite] = None
+        return list(candidates)
+
+    def candidates(self, sprite: Sprite, layer: str) -> List[Sprite]:
+        """Объекты слоя layer, которые могут столкнуться с объектом sprite"""
+        return [other for other in self.query(collision_rect(sprite), layer) if other is not sprite]
+
+
+class SweepAndPrune:
+    """Broadphase методом "sweep and prune". Объекты хранятся в списке, отсортированном по левой границе хитбокса,
+    и этот список живёт между кадрами. Астероиды движутся медленно, поэтому порядок почти не меняется, и сортировка
+    вставками при обновлении выполняется практически за линейное время. Один проход по отсортированному списку
+    находит все пересекающиеся хитбоксы за O(n + k), где k - количество пересечений"""
+
+    def __init__(self, categories):
+        # Пары слоёв, пересечения между которыми нужно запоминать (например, ("bullets", "enemies"))
+        self.categories = set(categories)
+        self.layers = {}  # Все отслеживаемые объекты и их слои
+        # Отсортированный по левой границе список записей [left, right, top, bottom, объект]
+        self.entries = []
+        self.removed = False  # Были ли удалены объекты с момента последнего обновления
+        self.overlaps = {}  # Словарь вида (объект, слой цели) -> список пересекающихся с ним объектов слоя
+
+    def add(self, sprite: Sprite, layer: str):
+        """Добавление нового объекта. Он займёт своё место в списке при ближайшей сортировке"""
+        if sprite in self.layers:
+            return
+        self.layers[sprite] = layer
+        rect = collision_rect(sprite)
+        self.entries.append([rect.left, rect.right, rect.top, rect.bottom, sprite])
+
+    def remove(self, sprite: Sprite):
+        """Удаление объекта. Записи удаляются из списка разом при следующем обновлении"""
+        if self.layers.pop(sprite, None) is not None:
+            self.removed = True
+
+    def sync(self):
+        """Обновление границ объектов, досортировка списка вставками и поиск всех пересечений.
+        Вызывается 1 раз за кадр"""
+        entries = self.entries
+        if self.removed:
+            entries[:] = [entry for entry in entries if entry[4] in self.layers]
+            self.removed = False
+        for entry in entries:
+            rect = collision_rect(entry[4])
+            entry[0], entry[1], entry[2], entry[3] = rect.left, rect.right, rect.top, rect.bottom
+        # Сортировка вставками: список почти упорядочен, поэтому сдвигать приходится лишь несколько записей
+        for i in range(1, len(entries)):
+            entry = entries[i]
+            j = i - 1
+            while j >= 0 and entries[j][0] > entry[0]:
+                entries[j + 1] = entries[j]
+                j -= 1
+            entries[j + 1] = entry
+        # Проход по списку с хранением "активных" записей, чьи интервалы по оси x ещё не закончились
+        self.overlaps = {}
+        layers, categories = self.layers, self.categories
+        active = []
+        for entry in entries:
+            left = entry[0]
+            active = [other for other in active if other[1] >= left]
+            sprite = entry[4]
+            layer = layers[sprite]
+            for other in active:
+                if other[2] <= entry[3] and entry[2] <= other[3]:  # Проверка пересечения по оси y
+                    other_sprite = other[4]
+                    other_layer = layers[other_sprite]
+                    if (layer, other_layer) in categories:
+                        self.overlaps.setdefault((sprite, other_layer), []).append(other_sprite)
+                    if (other_layer, layer) in categories:
+                        self.overlaps.setdefault((other_sprite, layer), []).append(sprite)
+            active.append(entry)
+
+    def candidates(self, sprite: Sprite, layer: str) -> List[Sprite]:
+        """Объекты слоя layer, хитбоксы которых пересекались с хитбоксом sprite при последнем обновлении"""
+        return self.overlaps.get((sprite, layer), [])
+
+
+class TrackedGroup(RenderPlain):
+    """Группа спрайтов, которая сообщает broadphase о добавлении и удалении своих объектов (в т.ч. через kill)"""
+
+    def __init__(self, layer: str, broadphase, *sprites):
+        self.layer = layer  # Название слоя объектов группы для broadphase
+        self.broadphase = broadphase
+        RenderPlain.__init__(self, *sprites)
+
+    def add_internal(self, sprite: Sprite, *args):
+        RenderPlain.add_internal(self, sprite, *args)
+        self.broadphase.add(sprite, self.layer)
+
+    def remove_internal(self, sprite: Sprite):
+        RenderPlain.remove_internal(self, sprite)
+        self.broadphase.remove(sprite)
+
+
+def bounding_radius(image: pygame.Surface) -> float:
+    """Радиус окружности, в которую помещается картинка при любом угле поворота (половина диагонали)"""
+    return math.hypot(*image.get_size()) / 2
+
+
+def visible_radius(image: pygame.Surface) -> float:
+    """Расстояние от центра картинки до самого дальнего непрозрачного пикселя"""
+    x, y = np.nonzero(pygame.surfarray.array_alpha(image) > 127)  # Тот же порог, что у pygame.mask.from_surface
+    if not len(x):
+        return 0
+    width, height = image.get_size()
+    # Берётся дальний угол пикселя, а не его центр
+    return float(np.hypot(abs(x + 0.5 - width / 2) + 0.5, abs(y + 0.5 - height / 2) + 0.5).max())
+
+
+def circle_rect_overlaps(centers: np.ndarray, radii: np.ndarray, rects: np.ndarray) -> np.ndarray:
+    """Векторизованная попарная проверка пересечения окружностей с прямоугольниками (i-я окружность с i-м
+    прямоугольником). rects - массив (n, 4) в формате pygame: left, top, width, height"""
+    nearest = np.clip(centers, rects[:, :2], rects[:, :2] + rects[:, 2:])  # Ближайшая к центру точка прямоугольника
+    offset = centers - nearest
+    return np.einsum("ij,ij->i", offset, offset) <= radii ** 2
+
+
+def circle_overlaps(sprites_a: List[Sprite], sprites_b: List[Sprite]) -> np.ndarray:
+    """Векторизованная проверка пересечения описанных окружностей для пар объектов (sprites_a[i], sprites_b[i]).
+    Возвращает булев массив длины len(sprites_a). Объекты должны иметь атрибуты pos и radius"""
+    pos_a = np.array([sprite.pos for sprite in sprites_a], dtype=float).reshape(-1, 2)
+    pos_b = np.array([sprite.pos for sprite in sprites_b], dtype=float).reshape(-1, 2)
+    # +1 пиксель на округление координат хитбоксов до целых
+    radius_a = np.array([sprite.radius for sprite in sprites_a], dtype=float) + 1
+    radius_b = np.array([sprite.radius for sprite in sprites_b], dtype=float)
+    diff = pos_a - pos_b  # Векторы между центрами объектов
+    squared_distances = np.einsum("ij,ij->i", diff, diff)
+    return squared_distances <= (radius_a + radius_b) ** 2
+
+
+@dataclass
+class RotatedImage:
+    """Повёрнутая картинка вместе с битовой маской и размерами"""
+    image: pygame.Surface
+    mask: pygame.mask.Mask
+    size: Tuple[int, int]
+
+
+DAMAGE_TINT = ((255, 70, 70), (110, 0, 0))  # Умножение и прибавка цвета картинки при попадании (красная вспышка)
+
+
+def damage_tint(surface: pygame.Surface) -> pygame.Surface:
+    """Копия картинки, окрашенная в красный для анимации попадания. Прозрачность не меняется"""
+    image = surface.copy()
+    image.fill(DAMAGE_TINT[0], special_flags=pygame.BLEND_RGB_MULT)
+    image.fill(DAMAGE_TINT[1], special_flags=pygame.BLEND_RGB_ADD)
+    return image
+
+
+class RotationCache:
+    """Кэш повёрнутых картинок. Поворот и построение битовой маски - дорогие операции, поэтому для каждой исходной
+    картинки они выполняются только 1 раз на каждый угол. Углы округляются с шагом step градусов.
+    Окрашенные при попадании варианты хранятся под тем же ключом с флагом tint и используют маску обычного варианта"""
+
+    def __init__(self, step: int = ROTATION_STEP):
+        self.step = step
+        self.cache = {}  # Словарь вида (исходная картинка, угол, окрашена) -> RotatedImage
+
+    def quantize(self, angle: float) -> int:
+        """Округление угла до ближайшего кратного шагу кэша (в диапазоне 0-359 градусов)"""
+        return int(round(angle / self.step) * self.step) % 360
+
+    def get(self, surface: pygame.Surface, angle: float, tint: bool = False) -> RotatedImage:
+        """Возвращает картинку surface, повёрнутую на угол angle (с округлением), её маску и размеры.
+        tint - картинка окрашена для анимации попадания"""
+        key = (surface, self.quantize(angle), tint)
+        rotated = self.cache.get(key)
+        if rotated is None and tint:
+            plain = self.get(surface, angle)
+            rotated = self.cache[key] = RotatedImage(damage_tint(plain.image), plain.mask, plain.size)
+        elif rotated is None:
+            image = pygame.transform.rotate(surface, key[1])
+            rotated = self.cache[key] = RotatedImage(image, pygame.mask.from_surface(image), image.get_size())
+        return rotated
+
+
+rotation_cache = RotationCache()  # Общий для всех объектов кэш повёрнутых картинок
+viewport = pygame.Rect((0, 0), SCREEN_SIZE)  # Видимая часть игрового поля. Объекты вне неё не рисуются
+culling_stats = {"culled": 0, "rotations_skipped": 0}  # Количество отсечённых невидимых объектов за последний кадр
+# Настройки качества, которые меняет QualityGovernor (вместе с шагом rotation_cache, бюджетом частиц и collision_shapes)
+quality_settings = {"asteroid_spin": True, "background": True, "glow": True}
+
+
+def rotation_culled(sprite: Sprite) -> bool:
+    """True, если поворот картинки объекта можно пропустить, так как объект не виден при любом угле поворота"""
+    radius = bounding_radius(sprite.image)  # Текущая картинка - поворот исходной, поэтому её описывает та же окружность
+    if CULL_OFFSCREEN_ROTATION and not viewport.inflate(2 * radius, 2 * radius).collidepoint(*sprite.pos):
+        culling_stats["rotations_skipped"] += 1
+        return True
+    return False
+
+
+def swept_circle_overlaps(bullets: List[Sprite], targets: List[Sprite]) -> np.ndarray:
+    """Векторизованная проверка пересечения отрезков, пройденных пулями за последний кадр (от prev_pos до pos),
+    с описанными окружностями целей для пар (bullets[i], targets[i]). Возвращает булев массив длины len(bullets).
+    В отличие от circle_overlaps не пропускает цели, которые быстрая пуля "перепрыгнула" за 1 кадр"""
+    start = np.array([bullet.prev_pos for bullet in bullets], dtype=float).reshape(-1, 2)
+    end = np.array([bullet.pos for bullet in bullets], dtype=float).reshape(-1, 2)
+    centers = np.array([target.pos for target in targets], dtype=float).reshape(-1, 2)
+    radius_a = np.array([bullet.radius for bullet in bullets], dtype=float) + 1
+    # Цели тоже движутся, поэтому радиус увеличивается на их перемещение за кадр
+    radius_b = np.array([target.radius + np.hypot(*getattr(target, "speed", (0, 0))) for target in targets])
+    travel = end - start  # Перемещения пуль за кадр
+    travel_sq = np.einsum("ij,ij->i", travel, travel)
+    to_center = centers - start  # Векторы от начала отрезков к центрам целей
+    # Параметр ближайшей к центру цели точки отрезка (0 - начало, 1 - конец)
+    t = np.einsum("ij,ij->i", to_center, travel) / np.maximum(travel_sq, 1e-9)
+    np.clip(t, 0, 1, out=t)
+    closest = to_center - t[:, np.newaxis] * travel
+    squared_distances = np.einsum("ij,ij->i", closest, closest)
+    return squared_distances <= (radius_a + radius_b) ** 2
+
+
+def convex_hull(points: np.ndarray) -> np.ndarray:
+    """Выпуклая оболочка множества точек (алгоритм Эндрю). Вершины возвращаются в порядке обхода"""
+    points = np.unique(points, axis=0)  # Сортировка по x, затем по y
+    if len(points) < 3:
+        return points
+
+    def half_hull(sorted_points):
+        hull = []
+        for point in sorted_points:
+            # Удаляем последнюю вершину, пока она не образует "левый поворот"
+            while len(hull) >= 2 and np.cross(hull[-1] - hull[-2], point - hull[-2]) <= 0:
+                hull.pop()
+            hull.append(point)
+        return hull[:-1]
+
+    return np.array(half_hull(points) + half_hull(points[::-1]), dtype=float)
+
+
+class PolygonCache:
+    """Кэш выпуклых многоугольников, описывающих картинки. Оболочка строится по битовой маске 1 раз для каждой
+    картинки, а при повороте объекта вершины поворачиваются математически (с тем же шагом угла, что и картинки)"""
+
+    def __init__(self):
+        self.hulls = {}  # Словарь вида картинка -> вершины оболочки относительно центра картинки
+        self.radii = {}  # Словарь вида картинка -> расстояние от центра до самой дальней вершины
+        self.rotated = {}  # Словарь вида (картинка, угол) -> повёрнутые вершины
+
+    def hull(self, surface: pygame.Surface) -> np.ndarray:
+        hull = self.hulls.get(surface)
+        if hull is None:
+            outline = pygame.mask.from_surface(surface).outline()
+            if len(outline) < 3:  # Слишком маленькая или пустая картинка - используем её прямоугольник
+                width, height = surface.get_size()
+                outline = [(0, 0), (width - 1, 0), (width - 1, height - 1), (0, height - 1)]
+            # Углы пикселей контура относительно центра картинки (оболочка должна покрывать пиксели целиком)
+            corners = np.array(outline, dtype=float)[:, np.newaxis, :] + np.array([(0, 0), (1, 0), (0, 1), (1, 1)])
+            points = corners.reshape(-1, 2) - np.array(surface.get_size()) / 2
+            hull = self.hulls[surface] = convex_hull(points)
+            self.radii[surface] = float(np.hypot(hull[:, 0], hull[:, 1]).max())
+        return hull
+
+    def radius(self, surface: pygame.Surface) -> float:
+        """Радиус окружности с центром в центре картинки, содержащей все непрозрачные пиксели"""
+        self.hull(surface)
+        return self.radii[surface]
+
+    def get(self, surface: pygame.Surface, angle: float) -> np.ndarray:
+        """Вершины оболочки картинки surface, повёрнутой на угол angle, относительно центра картинки"""
+        key = (surface, rotation_cache.quantize(angle))
+        vertices = self.rotated.get(key)
+        if vertices is None:
+            # pygame.transform.rotate поворачивает против часовой стрелки, а ось y направлена вниз
+            rad = math.radians(key[1])
+            cos, sin = math.cos(rad), math.sin(rad)
+            vertices = self.rotated[key] = self.hull(surface) @ np.array([[cos, -sin], [sin, cos]])
+        return vertices
+
+
+polygon_cache = PolygonCache()  # Общий для всех объектов кэш многоугольников
+# Форма каждого типа объектов при точной проверке столкновений (может меняться во время игры)
+collision_shapes = dict(COLLISION_SHAPES)
+# Формы в порядке возрастания точности. Для пары объектов используется наименее точная из их форм
+SHAPE_PRECISION = ("circle", "rect", "polygon", "mask")
+
+
+def _axes_separate(poly_a: np.ndarray, poly_b: np.ndarray, axes: np.ndarray) -> bool:
+    """True, если проекции многоугольников хотя бы на одну из осей не пересекаются"""
+    proj_a, proj_b = poly_a @ axes.T, poly_b @ axes.T
+    return bool(np.any((proj_a.max(axis=0) < proj_b.min(axis=0)) | (proj_b.max(axis=0) < proj_a.min(axis=0))))
+
+
+def _edge_normals(polygon: np.ndarray) -> np.ndarray:
+    edges = np.roll(polygon, -1, axis=0) - polygon
+    return np.stack((-edges[:, 1], edges[:, 0]), axis=1)
+
+
+def polygons_overlap(poly_a: np.ndarray, poly_b: np.ndarray) -> bool:
+    """Проверка пересечения выпуклых многоугольников по теореме о разделяющей оси (SAT)"""
+    axes = np.concatenate((_edge_normals(poly_a), _edge_normals(poly_b)))
+    return not _axes_separate(poly_a, poly_b, axes)
+
+
+def circle_polygon_overlap(center: np.ndarray, radius: float, polygon: np.ndarray) -> bool:
+    """Проверка пересечения окружности и выпуклого многоугольника по теореме о разделяющей оси"""
+    closest_vertex = polygon[np.argmin(np.einsum("ij,ij->i", polygon - center, polygon - center))]
+    axes = np.concatenate((_edge_normals(polygon), [closest_vertex - center]))
+    axes = axes / np.maximum(np.hypot(axes[:, 0], axes[:, 1]), 1e-9)[:, np.newaxis]
+    proj_polygon = polygon @ axes.T
+    proj_center = axes @ center
+    return not np.any((proj_polygon.max(axis=0) < proj_center - radius) |
+                      (proj_center + radius < proj_polygon.min(axis=0)))
+
+
+def pair_shape(sprite_a: Sprite, sprite_b: Sprite) -> str:
+    """Форма, по которой проверяется столкновение пары объектов (наименее точная из их форм)"""
+    return min(collision_shapes[sprite_a.entity_type], collision_shapes[sprite_b.entity_type],
+               key=SHAPE_PRECISION.index)
+
+
+def collide_shapes(sprite_a: Sprite, sprite_b: Sprite, shift: Tuple[float, float] = (0, 0)) -> bool:
+    """Точная проверка столкновения объектов с учётом выбранных в collision_shapes форм.
+    shift - дополнительное смещение объекта sprite_a (используется при проверке пути пули)"""
+    shape = pair_shape(sprite_a, sprite_b)
+    if shape == "mask":
+        offset = (round(sprite_a.rect.x + shift[0]) - sprite_b.rect.x,
+                  round(sprite_a.rect.y + shift[1]) - sprite_b.rect.y)
+        return sprite_b.mask.overlap(sprite_a.mask, offset) is not None
+    if shape == "rect":
+        return sprite_a.rect.move(round(shift[0]), round(shift[1])).colliderect(sprite_b.rect)
+    center_a = sprite_a.pos + shift
+    if shape == "circle":
+        radius_a = polygon_cache.radius(sprite_a.original_image)
+        radius_b = polygon_cache.radius(sprite_b.original_image)
+        # Окружность с хитбоксом или многоугольником проверяется точно, а не как две окружности
+        shapes = (collision_shapes[sprite_a.entity_type], collision_shapes[sprite_b.entity_type])
+        if shapes == ("circle", "rect"):
+            return bool(circle_rect_overlaps(center_a[np.newaxis], np.array([radius_a]),
+                                             np.array([sprite_b.rect], dtype=float))[0])
+        if shapes == ("rect", "circle"):
+            rect = sprite_a.rect.move(round(shift[0]), round(shift[1]))
+            return bool(circle_rect_overlaps(sprite_b.pos[np.newaxis], np.array([radius_b]),
+                                             np.array([rect], dtype=float))[0])
+        if shapes == ("circle", "polygon"):
+            return circle_polygon_overlap(center_a, radius_a,
+                                          polygon_cache.get(sprite_b.original_image, sprite_b.angle) + sprite_b.pos)
+        if shapes == ("polygon", "circle"):
+            return circle_polygon_overlap(sprite_b.pos, radius_b,
+                                          polygon_cache.get(sprite_a.original_image, sprite_a.angle) + center_a)
+        return math.hypot(*(center_a - sprite_b.pos)) <= radius_a + radius_b
+    return polygons_overlap(polygon_cache.get(sprite_a.original_image, sprite_a.angle) + center_a,
+                            polygon_cache.get(sprite_b.original_image, sprite_b.angle) + sprite_b.pos)
+
+
+def collide_along_path(bullet: Sprite, target: Sprite) -> bool:
+    """Проверка столкновения пули с целью в промежуточных положениях на пути пули за последний кадр
+    (конечное положение проверяется отдельно). Положения перебираются с шагом в половину толщины пули"""
+    if pair_shape(bullet, target) == "rect":
+        return collide_rect_swept(bullet, target)
+    travel = bullet.pos - bullet.prev_pos
+    step = max(min(bullet.original_image.get_size()) / 2, 1)
+    n_steps = int(math.hypot(*travel) / step)
+    for i in range(n_steps):
+        if collide_shapes(bullet, target, travel * (i / n_steps - 1)):
+            return True
+    return False
+
+
+def collide_rect_swept(bullet: Sprite, target: Sprite) -> bool:
+    """Проверка пересечения пути пули за последний кадр с хитбоксом цели"""
+    # Отрезок пересекает хитбокс цели, расширенный на размер пули, только если хитбоксы пересекались на пути
+    expanded = target.rect.inflate(bullet.rect.width, bullet.rect.height)
+    return bool(expanded.clipline(*map(round, bullet.prev_pos), *map(round, bullet.pos)))
+
+
+def resolve_elastic_collisions(pos: np.ndarray, vel: np.ndarray, radius: np.ndarray, mass: np.ndarray) -> np.ndarray:
+    """Упругие столкновения окружностей. Массивы координат (n, 2) и скоростей (n, 2) изменяются на месте.
+    Поиск пересекающихся пар и расчёт импульсов выполняются векторно для всех объектов сразу.
+    Возвращает индексы объектов, участвовавших в столкновениях"""
+    diff = pos[np.newaxis, :, :] - pos[:, np.newaxis, :]  # diff[i, j] - вектор от объекта i к объекту j
+    squared_distances = np.einsum("ijk,ijk->ij", diff, diff)
+    radii_sum = radius[:, np.newaxis] + radius[np.newaxis, :]
+    # Каждая пара учитывается 1 раз (i < j)
+    i, j = np.nonzero(np.triu(squared_distances < radii_sum ** 2, k=1))
+    if not len(i):
+        return i
+    distance = np.sqrt(squared_distances[i, j])
+    normal = diff[i, j] / np.maximum(distance, 1e-9)[:, np.newaxis]  # Единичная нормаль от i к j
+    inv_mass_i, inv_mass_j = 1 / mass[i], 1 / mass[j]
+    inv_mass_sum = inv_mass_i + inv_mass_j
+    # Расталкиваем пересекающиеся объекты обратно пропорционально их массам
+    correction = ((radii_sum[i, j] - distance) / inv_mass_sum)[:, np.newaxis] * normal
+    np.add.at(pos, i, -correction * inv_mass_i[:, np.newaxis])
+    np.add.at(pos, j, correction * inv_mass_j[:, np.newaxis])
+    # Импульс передаётся только сближающимся объектам
+    approach_speed = np.einsum("ij,ij->i", vel[j] - vel[i], normal)
+    impulse = np.where(approach_speed < 0, -2 * approach_speed / inv_mass_sum, 0)[:, np.newaxis] * normal
+    np.add.at(vel, i, -impulse * inv_mass_i[:, np.newaxis])
+    np.add.at(vel, j, impulse * inv_mass_j[:, np.newaxis])
+    return np.union1d(i, j)
+
+
+class MaskArena:
+    """Хранилище битовых масок в одном плоском массиве numpy. Строка маски упакована по 64 пикселя в слово uint64
+    (пиксель x - бит x % 64 слова x // 64) и дополнена пустым словом с каждой стороны. Поэтому при любом сдвиге
+    второй маски её слово, совпадающее со словом первой, собирается из двух соседних слов без проверки границ.
+    Маска копируется в хранилище 1 раз, после чего её пиксели доступны по смещению без вызовов pygame"""
+
+    def __init__(self, max_size: int = 2 ** 23):
+        self.max_size = max_size  # Размер в словах, при превышении которого хранилище очищается
+        self.data = np.zeros(2 ** 14, dtype=np.uint64)
+        self.size = 0  # Занятая часть массива data
+        # Словарь вида маска -> (смещение в data, ширина строки в словах вместе с пустыми,
+        # границы непустой части маски: left, top, right, bottom в пикселях)
+        self.entries = {}
+
+    @staticmethod
+    def _words(mask: pygame.mask.Mask) -> int:
+        """Количество слов, занимаемых маской в хранилище"""
+        width, height = mask.get_size()
+        return ((width + 63) // 64 + 2) * height
+
+    def _add(self, mask: pygame.mask.Mask):
+        width, height = mask.get_size()
+        stride = (width + 63) // 64 + 2
+        total = stride * height
+        if self.size + total > len(self.data):
+            self.data = np.resize(self.data, max(2 * len(self.data), self.size + total))
+        # Маска -> чёрно-белая картинка -> массив (x, y), который транспонируется в построчный порядок
+        bits = np.zeros((height, stride * 64), dtype=bool)
+        bits[:, 64:64 + width] = pygame.surfarray.array_red(mask.to_surface()).T > 0
+        self.data[self.size:self.size + total] = np.packbits(bits, axis=1, bitorder="little").view("<u8").ravel()
+        bounds = mask.get_bounding_rects()
+        bounds = bounds[0].unionall(bounds[1:]) if bounds else pygame.Rect(0, 0, 0, 0)
+        self.entries[mask] = (self.size, stride, bounds.left, bounds.top, bounds.right, bounds.bottom)
+        self.size += total
+
+    def lookup(self, masks: List[pygame.mask.Mask]) -> List[Tuple[int, ...]]:
+        """Положение масок в хранилище (новые маски добавляются). Если новые маски не помещаются, хранилище
+        очищается до их добавления, поэтому все возвращённые смещения действительны одновременно"""
+        unique = list(dict.fromkeys(masks))
+        missing = [mask for mask in unique if mask not in self.entries]
+        if self.size + sum(map(self._words, missing)) > self.max_size:
+            self.entries.clear()
+            self.size = 0
+            missing = unique
+        for mask in missing:
+            self._add(mask)
+        entries = self.entries
+        return [entries[mask] for mask in masks]
+
+
+mask_arena = MaskArena()
+
+
+def batch_collide_masks(pairs: List[Tuple[Sprite, Sprite]]) -> List[bool]:
+    """Проверка столкновений по битовым маскам сразу для множества пар объектов.
+    Для каждой пары вычисляется пересечение непустых частей масок (строки и слова первой маски), после чего слова
+    всех пересечений всех пар извлекаются из mask_arena одной операцией индексирования, сравниваются побитовым И
+    и сворачиваются по парам. Результат совпадает с pygame.sprite.collide_mask для каждой пары"""
+    if not pairs:
+        return []
+    entries = np.array(mask_arena.lookup([sprite.mask for pair in pairs for sprite in pair]), dtype=np.int64)
+    offset_a, stride_a, left_a, top_a, right_a, bottom_a = entries[0::2].T
+    offset_b, stride_b, left_b, top_b, right_b, bottom_b = entries[1::2].T
+    dx, dy = np.array([(b.rect.x - a.rect.x, b.rect.y - a.rect.y) for a, b in pairs], dtype=np.int64).T
+    # Пересечение непустых частей масок в координатах первой маски: пиксели [x0, x1), строки [y0, y1)
+    x0, x1 = np.maximum(left_a, left_b + dx), np.minimum(right_a, right_b + dx)
+    y0, y1 = np.maximum(top_a, top_b + dy), np.minimum(bottom_a, bottom_b + dy)
+    k0 = x0 // 64  # Слова первой маски [k0, k0 + window_w), покрывающие пересечение
+    window_w = np.where(x1 > x0, (x1 - 1) // 64 + 1 - k0, 0)
+    sizes = window_w * np.clip(y1 - y0, 0, None)
+    result = np.zeros(len(pairs), dtype=bool)
+    nonempty = np.flatnonzero(sizes)
+    if len(nonempty):
+        # Пиксель x первой маски совпадает с пикселем x - dx второй, поэтому слову k первой маски соответствуют
+        # биты второй, начиная с 64 * k - dx: старшие биты слова q и младшие биты слова q + 1 со сдвигом shift
+        q, shift = np.divmod(k0 * 64 - dx, 64)
+        base_a = (offset_a + y0 * stride_a + k0 + 1)[nonempty]  # Первое слово пересечения (после пустого слова)
+        base_b = (offset_b + (y0 - dy) * stride_b + q + 1)[nonempty]
+        stride_a, stride_b, shift = stride_a[nonempty], stride_b[nonempty], shift[nonempty].astype(np.uint64)
+        sizes, window_w = sizes[nonempty], window_w[nonempty]
+        starts = np.cumsum(sizes) - sizes  # Начало слов каждой пары в общем массиве
+        pair_idx = np.repeat(np.arange(len(nonempty)), sizes)  # Номер пары для каждого проверяемого слова
+        row, word = np.divmod(np.arange(sizes.sum()) - starts[pair_idx], window_w[pair_idx])
+        data = mask_arena.data
+        words_a = data[base_a[pair_idx] + row * stride_a[pair_idx] + word]
+        index_b = base_b[pair_idx] + row * stride_b[pair_idx] + word
+        shift = shift[pair_idx]
+        # Сдвиг на 64 бита не определён, поэтому старшее слово сдвигается в 2 приёма (1 + 63 - shift)
+        words_b = (data[index_b] >> shift) | ((data[index_b + 1] << np.uint64(1)) << (np.uint64(63) - shift))
+        result[nonempty] = np.bitwise_or.reduceat(words_a & words_b, starts) != 0
+    return result.tolist()
+
+
+health_bar_images = {}  # Залитые цветом поверхности, части которых рисуются как полосы здоровья
+
+
+def health_bar(color: Tuple[int, int, int], position: Tuple, width: float,
+               height: int) -> Tuple[pygame.Surface, Tuple, pygame.Rect]:
+    """Элемент списка для Surface.blits, рисующий полосу здоровья: часть заранее залитой цветом поверхности"""
+    surface = health_bar_images.get(color)
+    if surface is None:
+        surface = health_bar_images[color] = pygame.Surface((SCREEN_SIZE[0], 20)).convert()
+        surface.fill(color)
+    return surface, position, pygame.Rect(0, 0, max(width, 0), height)
+
+
+def present_frame(rects: List[pygame.Rect] = None):
+    """Вывод кадра в окно (целиком или только области rects). Если игра рисуется в кадр внутреннего разрешения,
+    он масштабируется до размера окна, и окно выводится целиком"""
+    window = pygame.display.get_surface()
+    if game_screen is not window:
+        pygame.transform.scale(game_screen, window.get_size(), window)
+        pygame.display.flip()
+    elif rects is None:
+        pygame.display.update()
+    else:
+        pygame.display.update(rects)
+
+
+def resize_window():
+    """Обработка изменения размера окна (pygame сам изменяет размер его поверхности). Если игра рисуется в кадр
+    внутреннего разрешения, игровое поле не меняется. Иначе его размер становится равным новому размеру окна"""
+    global game_screen, SCREEN_SIZE
+    if RENDER_RESOLUTION is None:
+        game_screen = pygame.display.get_surface()
+        SCREEN_SIZE = game_screen.get_size()
+        viewport.size = SCREEN_SIZE
+        health_bar_images.clear()  # Полоса здоровья босса может стать шире старой поверхности
+
+
+def cursor_pos() -> Tuple[float, float]:
+    """Координаты курсора на игровом поле (с учётом масштабирования кадра до размера окна)"""
+    x, y = pygame.mouse.get_pos()
+    window_width, window_height = pygame.display.get_surface().get_size()
+    if (window_width, window_height) == SCREEN_SIZE:
+        return x, y
+    return x * SCREEN_SIZE[0] / window_width, y * SCREEN_SIZE[1] / window_height
+
+
+class FullRenderer:
+    """Вывод кадра целиком: экран очищается и передаётся на дисплей полностью каждый кадр"""
+    tracks_dirty = False  # Области, на которых что-то нарисовано, не нужны
+
+    def __init__(self):
+        self.presented_area = 1  # Доля экрана, выведенная на дисплей в последнем кадре
+
+    def clear(self, screen: pygame.Surface, background: "ParallaxBackground" = None):
+        if background is None:
+            screen.fill(BG_COLOR)
+        else:
+            background.draw(screen)
+
+    def present(self, dirty: List[pygame.Rect]):
+        present_frame()
+
+    def invalidate(self):
+        pass
+
+
+class DirtyRectRenderer:
+    """Вывод только изменившихся областей экрана. Очищаются области, на которых что-то было нарисовано в прошлом
+    кадре, а на дисплей передаются эти же области и области, нарисованные в текущем кадре.
+    Поэтому всё, что рисуется на экране, должно вернуть свою область в present"""
+    tracks_dirty = True
+
+    def __init__(self):
+        self.previous = []  # Области, нарисованные в прошлом кадре
+        self.full_redraw = True  # Первый кадр (например, после экрана окончания игры) выводится целиком
+        self.presented_area = 1
+
+    def clear(self, screen: pygame.Surface, background: "ParallaxBackground" = None):
+        if background is not None:
+            if background.scrolled:  # Сдвинувшийся фон меняет весь экран, поэтому кадр выводится целиком
+                self.full_redraw = True
+            background.draw(screen, None if self.full_redraw else self.previous)
+        elif self.full_redraw:
+            screen.fill(BG_COLOR)
+        else:
+            for rect in self.previous:
+                screen.fill(BG_COLOR, rect)
+
+    def present(self, dirty: List[pygame.Rect]):
+        dirty = [rect for rect in dirty if rect.width > 0 and rect.height > 0]
+        if self.full_redraw:
+            present_frame()
+            self.full_redraw = False
+            self.presented_area = 1
+        else:
+            presented = self.previous + dirty
+            present_frame(presented)
+            # Оценка сверху: пересечения областей учитываются несколько раз
+            area = sum(rect.width * rect.height for rect in presented)
+            self.presented_area = min(area / (SCREEN_SIZE[0] * SCREEN_SIZE[1]), 1)
+        self.previous = dirty
+
+    def invalidate(self):
+        """Следующий кадр будет выведен целиком (например, после изменения размера окна)"""
+        self.full_redraw = True
+
+
+class ParallaxBackground:
+    """Звёздный фон из нескольких слоёв, которые сдвигаются вслед за движением игрока с разной скоростью (параллакс).
+    Картинка масштабируется и размножается в плитку слоя только при создании фона и изменении размера поля,
+    а кадр фона собирается из готовых плиток заново только тогда, когда слои сдвинулись хотя бы на пиксель.
+    Сдвинувшиеся слои меняют весь экран, поэтому в таких кадрах они собираются сразу на экране, а кадр фона
+    собирается лишь тогда, когда фон остановился и его нужно восстанавливать по областям"""
+
+    def __init__(self, layers: List[Tuple[float, float]] = BACKGROUND_LAYERS):
+        # Картинка загружается только при включённом фоне. Она больше страницы атласа, поэтому хранится отдельно
+        self.image = load_image(os.path.join("images", "background.png"))
+        self.layers = layers  # Слои от дальнего к ближнему: (масштаб, доля скорости игрока)
+        self.offsets = np.zeros((len(layers), 2))  # Сдвиг каждого слоя относительно начала его плитки
+        self.tiles = []
+        self.frame = None  # Собранный кадр фона размером с поле
+        self.composed = False  # Кадр frame собран при текущих сдвигах слоёв
+        self.scrolled = True  # Слои сдвинулись с последней отрисовки, и весь экран нужно нарисовать заново
+        self.draw_time = 0  # Время отрисовки фона в последнем кадре (в мс)
+        self.build(SCREEN_SIZE)
+
+    def build(self, size: Tuple[int, int]):
+        """Подготовка плиток слоёв для поля размера size. Плитка слоя с масштабом 1 покрывает всё поле и состоит
+        из 4 отражённых копий картинки, поэтому соседние плитки стыкуются без швов. На ближних слоях остаются
+        только самые яркие звёзды, остальные пиксели прозрачны"""
+        self.tiles = []
+        cover = max(size[0] / self.image.get_width(), size[1] / self.image.get_height())
+        for i, (scale, _) in enumerate(self.layers):
+            width, height = (round(self.image.get_width() * cover * scale / 2),
+                             round(self.image.get_height() * cover * scale / 2))
+            image = pygame.transform.smoothscale(self.image, (width, height))
+            tile = pygame.Surface((width * 2, height * 2)).convert()
+            tile.blits([(image, (0, 0)), (pygame.transform.flip(image, True, False), (width, 0)),
+                        (pygame.transform.flip(image, False, True), (0, height)),
+                        (pygame.transform.flip(image, True, True), (width, height))], False)
+            if i > 0:
+                pixels = pygame.surfarray.pixels3d(tile)
+                brightness = pixels.max(axis=2)
+                pixels[brightness < np.percentile(brightness, 97)] = 0
+                del pixels  # Поверхность заблокирована, пока существует массив её пикселей
+                tile.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+            self.tiles.append(tile)
+        self.frame = pygame.Surface(size).convert()
+        self.composed = False
+        self.scrolled = True
+
+    def update(self, speed: np.ndarray):
+        """Сдвиг слоёв против движения игрока (speed - вектор скорости игрока)"""
+        factors = np.array([factor for _, factor in self.layers])
+        previous = self.offsets.astype(int)
+        self.offsets = (self.offsets + np.outer(factors, speed)) % [tile.get_size() for tile in self.tiles]
+        if (self.offsets.astype(int) != previous).any():
+            self.scrolled = True
+            self.composed = False
+
+    def draw(self, screen: pygame.Surface, rects: List[pygame.Rect] = None):
+        """Отрисовка фона на весь экран или только в областях rects (их восстанавливает DirtyRectRenderer,
+        пока фон стоит на месте). Весь экран рисуется сборкой слоёв прямо на нём без копирования кадра фона.
+        Кадр фона собирается, только когда он нужен для восстановления областей: плитки с RLEACCEL заново
+        кодируются каждый раз, когда меняется поверхность, на которой они рисуются"""
+        start = time.perf_counter()
+        if rects is None:
+            if self.composed:
+                screen.blit(self.frame, (0, 0))
+            else:
+                self.compose(screen)
+        else:
+            if not self.composed:
+                self.compose(self.frame)
+                self.composed = True
+            screen.blits([(self.frame, rect, rect) for rect in rects], doreturn=False)
+        self.scrolled = False
+        self.draw_time = (time.perf_counter() - start) * 1000
+
+    def compose(self, target: pygame.Surface):
+        """Сборка фона из всех слоёв на поверхности target одним вызовом Surface.blits. Плитка не меньше поля,
+        поэтому видимая часть слоя состоит не более чем из 4 областей плитки"""
+        screen_width, screen_height = self.frame.get_size()
+        blit_sequence = []
+        for tile, (offset_x, offset_y) in zip(self.tiles, self.offsets.astype(int)):
+            tile_width, tile_height = tile.get_size()
+            y, area_y = 0, offset_y
+            while y < screen_height:
+                height = min(tile_height - area_y, screen_height - y)
+                x, area_x = 0, offset_x
+                while x < screen_width:
+                    width = min(tile_width - area_x, screen_width - x)
+                    blit_sequence.append((tile, (x, y), (area_x, area_y, width, height)))
+                    x, area_x = x + width, 0
+                y, area_y = y + height, 0
+        target.blits(blit_sequence, doreturn=False)
+
+
+class ParticleSystem:
+    """Система частиц (искры взрывов и пыль астероидов). Положения, скорости, время жизни и цвета всех частиц хранятся
+    в заранее выделенных массивах numpy, поэтому все частицы обновляются одной векторной операцией, а рисуются
+    записью в пиксели экрана через surfarray. Живые частицы всегда занимают начало массивов"""
+    drag = 0.95  # Доля скорости, которая сохраняется у частицы за кадр
+    cell_size = 64  # Размер ячеек сетки, из которых складываются изменённые частицами области экрана
+
+    def __init__(self, capacity: int = PARTICLE_BUDGET):
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.life = np.zeros(capacity)  # Оставшееся время жизни (в кадрах)
+        self.max_life = np.ones(capacity)  # Полное время жизни. Яркость частицы падает вместе с оставшимся временем
+        self.color = np.zeros((capacity, 3))
+        self.count = 0  # Количество живых частиц
+        self.budget = capacity  # Сколько частиц может жить одновременно. Лишние новые частицы не появляются
+
+    def clear(self):
+        self.count = 0
+
+    def emit(self, center: np.ndarray, count: int, speed: Tuple[float, float], life: Tuple[float, float],
+             color: Tuple[int, int, int]):
+        """Добавить count частиц, разлетающихся из точки center во все стороны. Скорость и время жизни каждой частицы
+        выбираются случайно из диапазонов speed и life, а яркость цвета color немного меняется"""
+        count = min(count, self.budget - self.count, len(self.life) - self.count)
+        if count <= 0:
+            return
+        new = slice(self.count, self.count + count)
+        angle = np.random.uniform(0, 2 * np.pi, count)
+        speed = np.random.uniform(*speed, count)
+        self.pos[new] = center
+        self.vel[new] = np.column_stack((np.cos(angle), np.sin(angle))) * speed[:, None]
+        self.life[new] = self.max_life[new] = np.random.uniform(*life, count)
+        self.color[new] = np.clip(np.multiply(color, np.random.uniform(0.7, 1.3, (count, 1))), 0, 255)
+        self.count += count
+
+    def update(self):
+        """Перемещение всех частиц и удаление погасших (оставшиеся частицы сдвигаются в начало массивов)"""
+        count = self.count
+        self.pos[:count] += self.vel[:count]
+        self.vel[:count] *= self.drag
+        self.life[:count] -= 1
+        alive = np.flatnonzero(self.life[:count] > 0)
+        if len(alive) < count:
+            for array in (self.pos, self.vel, self.life, self.max_life, self.color):
+                array[:len(alive)] = array[alive]
+            self.count = len(alive)
+
+    def draw(self, screen: pygame.Surface) -> List[pygame.Rect]:
+        """Отрисовка частиц квадратами 2x2 пикселя прямо в пиксели экрана. Возвращает ячейки сетки с частицами"""
+        count = self.count
+        if count == 0:
+            return []
+        width, height = screen.get_size()
+        x, y = self.pos[:count].astype(int).T
+        visible = (x >= 0) & (x < width - 1) & (y >= 0) & (y < height - 1)
+        x, y = x[visible], y[visible]
+        color = (self.color[:count] * (self.life[:count] / self.max_life[:count])[:, None])[visible].astype(np.uint32)
+        # Цвета переводятся в формат пикселей экрана
+        shifts, masks = screen.get_shifts(), screen.get_masks()
+        mapped = (color[:, 0] << shifts[0]) | (color[:, 1] << shifts[1]) | (color[:, 2] << shifts[2]) | masks[3]
+        pixels = pygame.surfarray.pixels2d(screen)
+        for dx, dy in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            pixels[x + dx, y + dy] = mapped
+        del pixels  # Экран заблокирован, пока существует массив его пикселей
+        rows = height // self.cell_size + 1
+        cells = np.unique(x // self.cell_size * rows + y // self.cell_size)
+        return [pygame.Rect(cell // rows * self.cell_size, cell % rows * self.cell_size, self.cell_size + 1,
+                            self.cell_size + 1) for cell in cells.tolist()]
+
+
+particles = ParticleSystem()  # Общая для всех объектов система частиц
+
+
+class GlowCache:
+    """Кэш ореолов свечения. Ореол картинки - её размытая копия на чёрном фоне с полями radius пикселей, которая
+    прибавляется к экрану (BLEND_ADD), поэтому чёрный фон ничего не меняет. Размытие (уменьшение и увеличение
+    картинки) выполняется только 1 раз для каждой картинки, в том числе для каждой повёрнутой картинки из кэша"""
+
+    def __init__(self, radius: int = GLOW_RADIUS, intensity: int = GLOW_INTENSITY):
+        self.radius = radius
+        self.intensity = intensity  # Во сколько раз ореол ярче размытой картинки
+        self.cache = {}  # Словарь вида картинка -> ореол
+
+    def get(self, surface: pygame.Surface) -> pygame.Surface:
+        """Ореол картинки surface (больше неё на radius пикселей с каждой стороны)"""
+        glow = self.cache.get(surface)
+        if glow is None:
+            width, height = surface.get_width() + 2 * self.radius, surface.get_height() + 2 * self.radius
+            glow = pygame.Surface((width, height)).convert()
+            glow.blit(surface, (self.radius, self.radius))
+            # Два прохода уменьшения и сглаженного увеличения дают размытие без заметных квадратов
+            for factor in (max(self.radius // 2, 1), max(self.radius // 3, 1)):
+                small = pygame.transform.smoothscale(glow, (max(width // factor, 1), max(height // factor, 1)))
+                glow = pygame.transform.smoothscale(small, (width, height))
+            for _ in range(self.intensity - 1):
+                glow.blit(glow, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+            self.cache[surface] = glow
+        return glow
+
+    def blit_item(self, sprite: Sprite) -> Tuple[pygame.Surface, Tuple[int, int], None, int]:
+        """Элемент списка для Surface.blits, рисующий ореол картинки объекта"""
+        position = (sprite.rect.x - self.radius, sprite.rect.y - self.radius)
+        return self.get(sprite.image), position, None, pygame.BLEND_ADD
+
+
+glow_cache = GlowCache()  # Общий для всех объектов кэш ореолов
+
+
+class TrailPool:
+    """Следы движущихся объектов. Последние length положений каждого объекта хранятся в кольцевом буфере - строке
+    общего заранее выделенного массива. Каждое положение записывается дважды (в ячейки head и head + length),
+    поэтому последние length положений всегда лежат подряд и рисуются без склейки двух частей буфера.
+    Все объекты записывают положение на одном и том же месте буфера, поэтому запись выполняется одной векторной
+    операцией для всех следов сразу. Занятость строк отмечается номером кадра, а номера ячеек и положения пишутся в
+    заранее выделенные массивы, поэтому после заполнения пула update и draw не создают новых массивов и списков"""
+
+    def __init__(self, capacity: int = TRAIL_CAPACITY, length: int = TRAIL_LENGTH):
+        self.length = length
+        self.points = np.zeros((capacity, 2 * length, 2))  # Буферы положений (строка на каждый след)
+        # Те же буферы одним плоским массивом комплексных чисел x + iy: положение занимает одну ячейку
+        self.cells = self.points.view(np.complex128).reshape(-1)
+        self.colors = [(0, 0, 0)] * capacity
+        self.owners = [None] * capacity  # Объект, которому принадлежит след
+        self.born = [0] * capacity  # Кадр, в котором в строку записано первое положение следа
+        self.free = np.arange(capacity - 1, -1, -1)  # Стек свободных строк буфера (первые n_free элементов)
+        self.n_free = capacity
+        self.owned = np.zeros(capacity, dtype=bool)  # Занятые строки
+        self.stamps = np.zeros(capacity, dtype=np.int64)  # Последний кадр, в котором объект строки был в группах
+        self.stale = np.zeros(capacity, dtype=bool)  # Занятые строки, объектов которых нет в группах
+        self.slots = [0] * capacity  # Строки следов, записанных в последнем кадре (первые count элементов)
+        self.indices = np.zeros(capacity, dtype=np.intp)  # Ячейки cells, в которые пишутся положения
+        self.positions = np.zeros(capacity, dtype=np.complex128)  # Положения объектов в последнем кадре
+        self.positions_xy = self.positions.view(float).reshape(capacity, 2)
+        self.count = 0  # Количество следов, записанных в последнем кадре
+        self.head = 0  # Место записи следующего положения
+        self.frame = 0
+
+    def update(self, groups: Dict[Any, Tuple[int, int, int]]):
+        """Запись текущих положений всех объектов групп (группа -> цвет их следов). Объекты, которых нет в группах,
+        освобождают свои строки буфера. Если свободных строк не осталось, новые объекты остаются без следа"""
+        self.frame += 1
+        frame, stride, count = self.frame, 2 * self.length, 0
+        for group, color in groups.items():
+            for sprite in group.spritedict:  # Перебор словаря группы не создаёт список её спрайтов
+                slot = getattr(sprite, "trail_slot", None)
+                if slot is None or self.owners[slot] is not sprite:
+                    if not self.n_free:
+                        continue
+                    self.n_free -= 1
+                    slot = sprite.trail_slot = int(self.free[self.n_free])
+                    self.owners[slot], self.colors[slot], self.born[slot] = sprite, color, frame
+                    self.owned[slot] = True
+                self.stamps[slot] = frame
+                self.slots[count] = slot
+                self.indices[count] = slot * stride + self.head
+                self.positions_xy[count] = sprite.pos
+                count += 1
+        # Строки, объекты которых не встретились в группах, возвращаются в пул
+        np.not_equal(self.stamps, frame, out=self.stale)
+        self.stale &= self.owned
+        if self.stale.any():
+            for slot in np.flatnonzero(self.stale):
+                self.owners[slot] = None
+                self.owned[slot] = False
+                self.free[self.n_free] = slot
+                self.n_free += 1
+        self.count = count
+        indices, positions = self.indices[:count], self.positions[:count]
+        np.put(self.cells, indices, positions)
+        indices += self.length
+        np.put(self.cells, indices, positions)
+        self.head = (self.head + 1) % self.length
+
+    def draw(self, screen: pygame.Surface, dirty: List[pygame.Rect] = None):
+        """Отрисовка всех следов ломаными за один проход. Области, на которых нарисованы следы, добавляются в dirty,
+        если они нужны способу вывода кадра"""
+        end = self.head + self.length  # Сразу за последним записанным положением
+        for i in range(self.count):
+            slot = self.slots[i]
+            size = min(self.frame - self.born[slot] + 1, self.length)
+            if size > 1:
+                rect = pygame.draw.lines(screen, self.colors[slot], False, self.points[slot, end - size:end])
+                if dirty is not None:
+                    dirty.append(rect)
+
+
+class QualityGovernor:
+    """Адаптивное качество: следит за временем кадров в скользящем окне и переключает ступени качества из
+    QUALITY_TIERS, чтобы кадр укладывался в бюджет. Каждая смена ступени выводится в консоль и сохраняется в changes"""
+
+    def __init__(self, tiers: List[Dict[str, Any]] = QUALITY_TIERS, window: int = QUALITY_WINDOW,
+                 headroom: float = QUALITY_HEADROOM):
+        self.tiers = tiers
+        self.budget = 1000 / MAX_FPS if MAX_FPS else float("inf")  # Бюджет кадра в мс (без ограничения FPS - нет)
+        self.headroom = headroom
+        self.frame_times = deque(maxlen=window)  # Время последних кадров в мс
+        self.tier = 0  # Текущая ступень (0 - лучшее качество)
+        self.changes = []  # Смены ступеней: (номер кадра, старая ступень, новая ступень, среднее время кадра)
+        self.apply(self.tiers[self.tier])
+
+    @staticmethod
+    def apply(settings: Dict[str, Any]):
+        """Применение настроек ступени качества"""
+        rotation_cache.step = settings["rotation_step"]
+        particles.budget = settings["particle_budget"]
+        collision_shapes.update(settings["collision_shapes"])
+        quality_settings.update(asteroid_spin=settings["asteroid_spin"], background=settings["background"],
+                                glow=settings["glow"])
+
+    def record(self, frame_time: float, frame: int) -> bool:
+        """Учёт времени очередного кадра (в мс). Ступень меняется, только когда окно заполнено.
+        Возвращает True, если ступень изменилась"""
+        self.frame_times.append(frame_time)
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return False
+        average = sum(self.frame_times) / len(self.frame_times)
+        if average > self.budget and self.tier < len(self.tiers) - 1:
+            self.set_tier(self.tier + 1, average, frame)
+        elif average < self.budget * self.headroom and self.tier > 0:
+            self.set_tier(self.tier - 1, average, frame)
+        else:
+            return False
+        return True
+
+    def set_tier(self, tier: int, average: float, frame: int):
+        print(f"Frame {frame}: quality tier {self.tier} -> {tier}, "
+              f"average frame time {average:.2f} ms (budget {self.budget:.2f} ms)")
+        self.changes.append((frame, self.tier, tier, average))
+        self.tier = tier
+        self.apply(self.tiers[tier])
+        self.frame_times.clear()
+
+
+class GlyphAtlas:
+    """Атлас символов шрифта: каждый символ отрисовывается шрифтом только 1 раз (цифры - сразу, остальные символы -
+    при первом использовании). Текст собирается из готовых картинок символов, поэтому при выводе часто меняющихся
+    чисел новые поверхности шрифта не создаются"""
+
+    def __init__(self, font: pygame.font.Font, color: Tuple[int, int, int] = (255, 255, 255),
+                 chars: str = "0123456789"):
+        self.font = font
+        self.color = color
+        self.glyphs = {}  # Словарь вида символ -> картинка символа
+        for char in chars:
+            self.glyph(char)
+
+    def glyph(self, char: str) -> pygame.Surface:
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.glyphs[char] = self.font.render(char, False, self.color)
+        return glyph
+
+    def size(self, text: str) -> Tuple[int, int]:
+        return sum(self.glyph(char).get_width() for char in text), self.font.get_height()
+
+    def blit_sequence(self, text: str, position: Union[np.ndarray, Tuple]) -> List[Tuple[pygame.Surface, Tuple]]:
+        """Список для Surface.blits, выводящий текст text с левым верхним углом в точке position"""
+        x, y = position
+        blit_sequence = []
+        for char in text:
+            glyph = self.glyph(char)
+            blit_sequence.append((glyph, (x, y)))
+            x += glyph.get_width()
+        return blit_sequence
+
+    def render(self, text: str) -> pygame.Surface:
+        """Картинка с текстом text (аналог Font.render)"""
+        surface = pygame.Surface(self.size(text), pygame.SRCALPHA)
+        surface.blits(self.blit_sequence(text, (0, 0)), False)
+        return surface.convert_alpha()
+
+
+class HudPanel:
+    """Элемент интерфейса, привязанный к значению (счёту, боезапасу и т.п.). Картинка элемента хранится и
+    перерисовывается только при изменении значения. В stats считается количество выполненных и избежанных отрисовок"""
+
+    def __init__(self, render: Callable[[Any], pygame.Surface], stats: Dict[str, int]):
+        self.render = render  # Функция, рисующая картинку элемента по значению
+        self.stats = stats
+        self.value = None
+        self.surface = None
+
+    def get(self, value: Any = None) -> pygame.Surface:
+        """Картинка элемента для значения value"""
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.render(value)
+            self.stats["renders"] += 1
+        else:
+            self.stats["avoided"] += 1
+        return self.surface
+
+
+class Radar:
+    """Радар: уменьшенная карта игрового поля вместе с полосой шириной margin за его границами, откуда появляются
+    астероиды и враги. Точки объектов записываются прямо в пиксели собственной маленькой поверхности раз в period
+    кадров, а между обновлениями на экран выводится готовая поверхность"""
+    background_color = (0, 0, 40)
+    frame_color = (90, 90, 140)  # Цвет рамки видимой части поля
+
+    def __init__(self, size: Tuple[int, int] = RADAR_SIZE, period: int = RADAR_PERIOD, margin: int = RADAR_MARGIN):
+        self.surface = pygame.Surface(size).convert()
+        self.surface.set_alpha(200)
+        self.period = period
+        self.margin = margin
+        self.refresh_time = 0  # Время последнего обновления в мс
+
+    def update(self, frame: int, groups: Dict[Any, Tuple[int, int, int]]):
+        """Обновление радара, если с прошлого обновления прошло period кадров (группа -> цвет точек её объектов)"""
+        if frame % self.period == 0:
+            self.refresh(groups)
+
+    def refresh(self, groups: Dict[Any, Tuple[int, int, int]]):
+        """Перерисовка радара по текущим положениям объектов"""
+        start = time.perf_counter()
+        width, height = self.surface.get_size()
+        scale = np.divide((width, height), np.add(SCREEN_SIZE, 2 * self.margin))
+        self.surface.fill(self.background_color)
+        pygame.draw.rect(self.surface, self.frame_color, (*self.margin * scale, *np.multiply(SCREEN_SIZE, scale)), 1)
+        pixels = pygame.surfarray.pixels2d(self.surface)
+        for group, color in groups.items():
+            if not group:
+                continue
+            positions = np.fromiter((value for sprite in group for value in sprite.pos), dtype=float,
+                                    count=2 * len(group)).reshape(-1, 2)
+            x, y = ((positions + self.margin) * scale).astype(int).T
+            inside = (x >= 0) & (x < width - 1) & (y >= 0) & (y < height - 1)
+            x, y = x[inside], y[inside]
+            # Каждый объект - квадрат 2x2 пикселя
+            pixels[x, y] = pixels[x + 1, y] = pixels[x, y + 1] = pixels[x + 1, y + 1] = self.surface.map_rgb(color)
+        del pixels  # Поверхность заблокирована, пока существует массив её пикселей
+        self.refresh_time = (time.perf_counter() - start) * 1000
+
+
 class GUI:
-    """Класс, контролирующий отрисовку интерфейса"""
-    interface_pictures = {"Normal_bullets": pygame.transform.rotate(
-        pygame.image.load(os.path.join("images", "bullet.png")), 90),
-        "Explosive_bullets": pygame.transform.rotate(
-            pygame.image.load(os.path.join("images", "powered_bullet.png")), 90)}
+    """Класс, контролирующий отрисовку интерфейса. Элементы интерфейса хранятся готовыми картинками (HudPanel),
+    которые перерисовываются только при изменении их значений, и выводятся на экран одним вызовом Surface.blits"""
+    interface_pictures = {"Normal_bullets": texture_atlas.add("Normal_bullets", pygame.transform.rotate(
+        load_image(os.path.join("images", "bullet.png")), 90)),
+        "Explosive_bullets": texture_atlas.add("Explosive_bullets", pygame.transform.rotate(
+            load_image(os.path.join("images", "powered_bullet.png")), 90))}
 
     def __init__(self, screen: pygame.Surface, starship: pygame.sprite.Sprite):
         self.screen = screen
@@ -57,15 +1185,34 @@ class GUI:
         self.score_font = pygame.font.SysFont('Comic Sans MS', 30)
         self.gameover_font = pygame.font.SysFont('Comic Sans MS', 126)
         self.text_font = pygame.font.SysFont('Comic Sans MS', 56)
-        self.score_position = np.array((SCREEN_SIZE[0] - 150, 0))  # Координаты надписи со счётом игрока
-        self.abilities_position = np.array((5, SCREEN_SIZE[1] / 2))  # Координаты счётчиков способностей
+        self.debug_font = pygame.font.SysFont('Comic Sans MS', 18)
+        # Атласы символов шрифтов. Весь текст интерфейса собирается из готовых картинок символов
+        self.score_glyphs = GlyphAtlas(self.score_font)
+        self.gameover_glyphs = GlyphAtlas(self.gameover_font)
+        self.text_glyphs = GlyphAtlas(self.text_font)
+        self.debug_glyphs = GlyphAtlas(self.debug_font, (255, 255, 0))
+        self.layout()
         self.abilities_v_offset = np.array((0, 35))  # Сдвиг нового счётчика способностей относительно предыдущего
-        self.weapon_panel_position = np.array((5, SCREEN_SIZE[1] / 4))  # Координаты панели с оружием
         self.weapons_v_offset = np.array((0, 35))  # Сдвиг очередного элемента на панели оружия
         self.switch_weapon_hint_timeout = 160  # Время подсказки о смене оружия (в кадрах)
         self.switch_weapon_hint_active = False  # Статус подсказки о смене оружия
         self.stasis_hint_timeout = 160  # Время подсказки о активации "стазиса"
         self.stasis_hint_active = False  # Статус подсказки о активации "стазиса"
+        self.render_stats = {"renders": 0, "avoided": 0}  # Количество выполненных и избежанных отрисовок элементов
+        self.score_panel = HudPanel(lambda score: self.render_text(f'Score: {score}'), self.render_stats)
+        self.weapon_hint_panel = HudPanel(lambda _: self.render_text('Нажмите "Пробел" для смены оружия'),
+                                          self.render_stats)
+        self.stasis_hint_panel = HudPanel(lambda _: self.render_text('Зажмите "s" для активации стазиса'),
+                                          self.render_stats)
+        self.weapon_panels = {}  # Элементы панели оружия (картинка оружия и боезапас) для каждого оружия
+        self.radar = Radar() if RADAR else None  # Радар в левом нижнем углу
+
+    def layout(self):
+        """Расчёт положения элементов интерфейса по размеру игрового поля"""
+        self.score_position = np.array((SCREEN_SIZE[0] - 150, 0))  # Координаты надписи со счётом игрока
+        self.abilities_position = np.array((5, SCREEN_SIZE[1] / 2))  # Координаты счётчиков способностей
+        self.weapon_panel_position = np.array((5, SCREEN_SIZE[1] / 4))  # Координаты панели с оружием
+        self.radar_position = (5, SCREEN_SIZE[1] - RADAR_SIZE[1] - 5)  # Координаты радара
 
     def update(self, score: int, weapon_type: str, weapons: Dict[str, Weapon], timed_abilities: Dict[str, Ability]):
         """Метод, обновляющий GUI"""
@@ -73,52 +1220,75 @@ class GUI:
         self.weapon_type = weapon_type
         self.weapons = weapons
         self.timed_abilities = timed_abilities
-        self.draw()
-
-    def draw(self):
-        """Отрисовка всех стационарных компонентов GUI"""
-        self.draw_score()
-        self.draw_weapons()
-        self.draw_abilities()
-        self.draw_hints()
-
-    def draw_score(self):
+        return self.draw()
+
+    def draw(self) -> List[pygame.Rect]:
+        """Отрисовка всех стационарных компонентов GUI. Возвращает области экрана, на которых они нарисованы"""
+        return self.screen.blits(self.draw_score() + self.draw_weapons() + self.draw_abilities() + self.draw_hints() +
+                                 self.draw_radar())
+
+    def render_text(self, text: str) -> pygame.Surface:
+        return self.score_glyphs.render(text)
+
+    def render_weapon(self, weapon: str, ammo: float) -> pygame.Surface:
+        """Картинка элемента панели оружия: картинка оружия и боезапас справа от неё"""
+        picture = self.interface_pictures[weapon]
+        ammo_text = self.render_text("Infinite" if ammo == float("inf") else str(ammo))
+        surface = pygame.Surface((picture.get_width() + 10 + ammo_text.get_width(),
+                                  max(picture.get_height(), ammo_text.get_height())), pygame.SRCALPHA)
+        surface.blit(picture, (0, 0))
+        surface.blit(ammo_text, (picture.get_width() + 10, 0))
+        return surface.convert_alpha()
+
+    def draw_score(self) -> List[Tuple[pygame.Surface, np.ndarray]]:
         """Отрисовка счёта игрока"""
-        score_text = self.score_font.render(f'Score: {self.score}', False, (255, 255, 255))
-        self.screen.blit(score_text, self.score_position)
+        return [(self.score_panel.get(self.score), self.score_position)]
 
-    def draw_weapons(self):
+    def draw_weapons(self) -> List[Tuple[pygame.Surface, np.ndarray]]:
         """Отрисовка списка доступного и активного оружия вместе с боезапасом"""
+        blit_sequence = []
         vertical_offset = 1
         for weapon in self.weapons:
             active_offset = np.array((0, 0))  # Сдвиг для активного оружия (немного выступает из общего списка)
-            horizontal_offset = np.array((self.interface_pictures[weapon].get_size()[0] + 10, 0))
             if weapon == self.weapon_type:
                 active_offset[0] = 20
-            abs_voff = vertical_offset * self.weapons_v_offset
-            image_coords = self.weapon_panel_position + abs_voff + active_offset
-            self.screen.blit(self.interface_pictures[weapon], image_coords)
-            ammo = "Infinite" if (ammo := self.weapons[weapon].ammo) == float("inf") else str(ammo)
-            ammo_text = self.score_font.render(ammo, False, (255, 255, 255))
-            text_coords = self.weapon_panel_position + abs_voff + active_offset + horizontal_offset
-            self.screen.blit(ammo_text, text_coords)
+            if weapon not in self.weapon_panels:
+                self.weapon_panels[weapon] = HudPanel(lambda ammo, weapon=weapon: self.render_weapon(weapon, ammo),
+                                                      self.render_stats)
+            image_coords = self.weapon_panel_position + vertical_offset * self.weapons_v_offset + active_offset
+            blit_sequence.append((self.weapon_panels[weapon].get(self.weapons[weapon].ammo), image_coords))
             vertical_offset += 1
+        return blit_sequence
 
-    def draw_abilities(self):
-        """Отрисовка доступных способностей"""
-        text = self.score_font.render(f'Stasis: {self.timed_abilities["Stasis"].amount:.0f}', False, (255, 255, 255))
-        self.screen.blit(text, self.abilities_position)
+    def draw_abilities(self) -> List[Tuple[pygame.Surface, Tuple]]:
+        """Отрисовка доступных способностей. Во время действия "стазиса" его счётчик меняется каждый кадр, поэтому
+        он собирается из символов прямо на экране, а не хранится готовой картинкой"""
+        return self.score_glyphs.blit_sequence(f'Stasis: {self.timed_abilities["Stasis"].amount:.0f}',
+                                               self.abilities_position)
 
-    def draw_hints(self):
+    def draw_hints(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
         """Отрисовка игровых подсказок"""
+        blit_sequence = []
         if self.switch_weapon_hint_active and self.switch_weapon_hint_timeout:
-            text = self.score_font.render(f'Нажмите "Пробел" для смены оружия', False, (255, 255, 255))
-            self.screen.blit(text, self.starship.rect.topright)
+            blit_sequence.append((self.weapon_hint_panel.get(), self.starship.rect.topright))
             self.switch_weapon_hint_timeout -= 1
         if self.stasis_hint_active and self.stasis_hint_timeout:
-            text = self.score_font.render(f'Зажмите "s" для активации стазиса', False, (255, 255, 255))
-            self.screen.blit(text, self.starship.rect.topright)
+            blit_sequence.append((self.stasis_hint_panel.get(), self.starship.rect.topright))
             self.stasis_hint_timeout -= 1
+        return blit_sequence
+
+    def draw_radar(self) -> List[Tuple[pygame.Surface, Tuple[int, int]]]:
+        """Отрисовка радара (готовой картинки с последнего обновления)"""
+        return [(self.radar.surface, self.radar_position)] if self.radar is not None else []
+
+    def draw_debug_info(self, lines: List[str]) -> List[pygame.Rect]:
+        """Отрисовка отладочной информации (статистики производительности) в правом нижнем углу"""
+        blit_sequence = []
+        line_height = self.debug_font.get_linesize()
+        for i, line in enumerate(reversed(lines), start=1):
+            position = (SCREEN_SIZE[0] - self.debug_glyphs.size(line)[0] - 5, SCREEN_SIZE[1] - line_height * i)
+            blit_sequence += self.debug_glyphs.blit_sequence(line, position)
+        return self.screen.blits(blit_sequence)
 
     def activate_stasis_hint(self):
         self.stasis_hint_active = True
@@ -128,17 +1298,20 @@ class GUI:
 
     def game_over(self):
         """Вызывает экран окончания игры"""
-        gameover_text = self.gameover_font.render('GAME OVER!', False, (255, 255, 255))
-        info_text = self.text_font.render(f'Your score is {self.score}', False, (255, 255, 255))
-        resume_text = self.text_font.render('Click to continue', False, (255, 255, 255))
+        gameover_text = self.gameover_glyphs.render('GAME OVER!')
+        info_text = self.text_glyphs.render(f'Your score is {self.score}')
+        resume_text = self.text_glyphs.render('Click to continue')
         while True:  # Цикл ожидания действия игрока (выйти или продолжить)
             self.screen.blit(gameover_text, (SCREEN_SIZE[0] / 3.5, SCREEN_SIZE[1] / 3.5))
             self.screen.blit(info_text, (SCREEN_SIZE[0] / 3.5 * 1.2, SCREEN_SIZE[1] / 3.5 * 2))
             self.screen.blit(resume_text, (SCREEN_SIZE[0] / 3.5 * 1.2, SCREEN_SIZE[1] / 3.5 * 2.2))
-            pygame.display.flip()
+            present_frame()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     sys.exit()  # Выход из игры
+                if event.type == pygame.VIDEORESIZE:  # Изменение размера окна
+                    resize_window()
+                    self.screen = game_screen
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     return  # Продолжение игры
 
@@ -149,14 +1322,55 @@ class Game:
 
     def __init__(self, screen):
         self.screen = screen
+        # Обработчики столкновений. Ключ - категория пары (активный объект, цель), значение - функция точной
+        # проверки столкновения и обработчик, получающий активный объект и список поражённых им целей.
+        # Для взрывов функции проверки нет: пары проверяются по радиусу взрыва сразу для всех взрывов при сборе
+        # кандидатов, а обработчик вызывается 1 раз за кадр со всеми попаданиями категории.
+        # Порядок категорий задаёт порядок обработки столкновений
+        self.collision_handlers = {("bullets", "asteroids"): (collide_shapes, self.bullet_hits_asteroids),
+                                   ("bullets", "enemies"): (collide_shapes, self.bullet_hits_enemies),
+                                   ("enemy_bullets", "asteroids"): (collide_shapes, self.enemy_bullet_hits_asteroids),
+                                   ("enemy_bullets", "starship"): (collide_shapes, self.enemy_bullet_hits_starship),
+                                   ("explosions", "asteroids"): (None, self.explosion_hits_asteroids),
+                                   ("explosions", "enemy_bullets"): (None, self.explosion_hits_bullets),
+                                   ("explosions", "enemies"): (None, self.explosion_hits_enemies),
+                                   ("explosions", "boosters"): (None, self.explosion_hits_boosters),
+                                   ("starship", "asteroids"): (collide_shapes, self.starship_hits_asteroids)}
+        # Для пуль проверяется весь путь за кадр, чтобы быстрые пули не "перепрыгивали" цели
+        self.swept_categories = {category for category in self.collision_handlers
+                                 if category[0] in ("bullets", "enemy_bullets")} if SWEPT_COLLISIONS else set()
+        self.area_categories = [category for category in self.collision_handlers if category[0] == "explosions"]
+        # Структура для быстрого поиска пар кандидатов на столкновение. Группы ниже сообщают ей о появлении и
+        # уничтожении объектов
+        if COLLISION_BROADPHASE == "sweep":
+            self.broadphase = SweepAndPrune(self.collision_handlers.keys())
+        else:
+            self.broadphase = SpatialHash()
         self.starship = Starship()  # Объект класса Starship (игрок)
-        self.enemies = RenderPlain()  # Хранение объектов врагов (Enemy)
-        self.bullets = RenderPlain()  # Хранение объектов пуль (Bullet)
-        self.enemy_bullets = RenderPlain()  # Хранение объектов вражеских пуль (они имеют отличное от обычных поведение)
-        self.asteroids = RenderPlain()  # Хранение объектов астероидов (Asteroid)
-        self.boosters = RenderPlain()  # Хранение объектов бустеров (Booster)
-        self.explosions = RenderPlain()  # Хранение объектов взрывов (Explosions)
+        self.broadphase.add(self.starship, "starship")
+        self.player = RenderPlain(self.starship)  # Группа для отрисовки игрока
+        self.enemies = TrackedGroup("enemies", self.broadphase)  # Хранение объектов врагов (Enemy)
+        self.bullets = TrackedGroup("bullets", self.broadphase)  # Хранение объектов пуль (Bullet)
+        # Хранение объектов вражеских пуль (они имеют отличное от обычных поведение)
+        self.enemy_bullets = TrackedGroup("enemy_bullets", self.broadphase)
+        self.asteroids = TrackedGroup("asteroids", self.broadphase)  # Хранение объектов астероидов (Asteroid)
+        self.boosters = TrackedGroup("boosters", self.broadphase)  # Хранение объектов бустеров (Booster)
+        self.explosions = TrackedGroup("explosions", self.broadphase)  # Хранение объектов взрывов (Explosions)
         self.gui = GUI(screen, self.starship)  # Объект интерфейса пользователя
+        # Способ вывода кадров на экран: целиком или только изменившиеся области
+        self.renderer = DirtyRectRenderer() if RENDERER == "dirty" else FullRenderer()
+        self.background = ParallaxBackground() if PARALLAX_BACKGROUND else None  # None - однотонный фон
+        particles.clear()  # Частицы прошлой игры не переходят в новую
+        self.trails = TrailPool() if TRAILS else None  # Следы игрока и пуль
+        self.trail_colors = {self.player: (60, 140, 255), self.bullets: (200, 200, 160),
+                             self.enemy_bullets: (220, 60, 60)}  # Цвета следов объектов каждой группы
+        self.radar_colors = {self.asteroids: (150, 150, 150), self.boosters: (255, 255, 0),
+                             self.enemies: (255, 60, 60), self.player: (0, 255, 0)}  # Цвета точек на радаре
+        # Понижение качества при нехватке времени на кадр (None - качество всегда задаётся настройками)
+        self.governor = QualityGovernor() if ADAPTIVE_QUALITY else None
+        # Статистика проверок столкновений за последний кадр: выполненные и пропущенные благодаря broadphase,
+        # а также количество пар, попаданий и затраченное время (в мс) для каждой категории
+        self.collision_stats = {"narrow_checks": 0, "skipped_checks": 0, "mask_batch_time": 0, "categories": {}}
         # Время отключения бустера (0 означает, что бустер неактивен)
         self.boosters_timeouts = {"Rapid_fire": 0,
                                   "Shield": 0,
@@ -185,6 +1399,16 @@ class Game:
         self.score_trigger = SCORE_TRIGGER  # Счёт по достижении которого появляется босс (150, 300, 450 и т.д.)
         self.score = 0  # Текущий счёт
 
+    def resize(self):
+        """Обработка изменения размера окна: пересчёт размеров игрового поля и положения элементов интерфейса.
+        Астероиды и враги появляются у новых границ поля, так как их позиции рассчитываются по SCREEN_SIZE"""
+        resize_window()
+        self.screen = self.gui.screen = game_screen
+        self.gui.layout()
+        self.renderer.invalidate()
+        if self.background is not None:
+            self.background.build(SCREEN_SIZE)
+
     def switch_weapon(self):
         """Переключение оружия "по кругу" """
         self.weapon_type = next(self.weapon_selector)
@@ -196,6 +1420,8 @@ class Game:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # Если окно программы закрывается
                 sys.exit()  # Завершить выполнение программы
+            if event.type == pygame.VIDEORESIZE:  # Изменение размера окна
+                self.resize()
             if event.type == pygame.MOUSEBUTTONDOWN:  # Нажатие на кнопку мыши
                 self.mouse_pressed = True  # Сохраняем состояние кнопки
             if event.type == pygame.MOUSEBUTTONUP:  # Отпускание кнопки мыши
@@ -215,7 +1441,7 @@ class Game:
                 (time.time() - self.starship.last_bullet_time) > self.weapons[self.weapon_type].fire_rate and \
                 self.weapons[self.weapon_type].ammo > 0:
             # Создание новых пуль заданного типа (выстрел)
-            new_bullets = self.starship.fire(pygame.mouse.get_pos(), BULLET_SPEED,
+            new_bullets = self.starship.fire(cursor_pos(), BULLET_SPEED,
                                              self.max_bullets, self.weapons[self.weapon_type].type)
             self.bullets.add(*new_bullets)  # Добавление пуль в игру
             self.weapons[self.weapon_type].ammo -= 1  # Обновление боезапаса
@@ -232,7 +1458,7 @@ class Game:
                 elif enemy.type == "type_3":
                     new_bullets = enemy.fire(self.starship.pos, 5, enemy.max_bullets)  # Создаём новые объекты пуль
                 elif enemy.type == "type_4":
-                    new_bullets = enemy.fire(pygame.mouse.get_pos(), 10, enemy.max_bullets)
+                    new_bullets = enemy.fire(cursor_pos(), 10, enemy.max_bullets)
                 else:
                     new_bullets = []
                 self.enemy_bullets.add(*new_bullets)  # Добавление пуль в игру
@@ -311,120 +1537,285 @@ class Game:
         for sprite_group in sprite_groups:
             sprite_group.update()
 
+    def collide_asteroids(self):
+        """Режим физики астероидов: астероиды отскакивают друг от друга, масса зависит от их размера"""
+        asteroids = self.asteroids.sprites()
+        if len(asteroids) < 2:
+            return
+        pos = np.array([asteroid.pos for asteroid in asteroids], dtype=float)
+        vel = np.array([asteroid.speed for asteroid in asteroids], dtype=float)
+        radius = np.array([asteroid.body_radius for asteroid in asteroids])
+        mass = np.array([ASTEROID_MASSES[asteroid.type] for asteroid in asteroids], dtype=float)
+        for idx in resolve_elastic_collisions(pos, vel, radius, mass).tolist():
+            asteroids[idx].pos = pos[idx]
+            asteroids[idx].speed = vel[idx]
+
     @staticmethod
     def update_enemies(enemies: pygame.sprite.RenderPlain, player: pygame.sprite.Sprite):
         """Обновить врагов (перемещение в сторону игрока)"""
         enemies.update(player)
 
-    @staticmethod
-    def draw_enemies(enemies: pygame.sprite.RenderPlain, screen: pygame.Surface):
-        """Отрисовка врагов и их полос здоровья"""
-        enemies.draw(screen)
-        for enemy in enemies:
-            enemy.draw_health_bar(screen)
-
     def draw(self, player: pygame.sprite.RenderPlain, sprite_groups: list,
-             enemies: pygame.sprite.RenderPlain, debug: bool = False):
+             enemies: pygame.sprite.RenderPlain, debug: bool = False) -> List[pygame.Rect]:
         """Метод отрисовки объектов. Переносит на игровое поле все объекты переданные ему внутри аргумена
-        objects_list """
-        self.screen.fill(BG_COLOR)  # Залить экран одним цветом (необходимо для корректной отрисовки каждого кадра)
-        player.draw(self.screen)  # Отрисовка игрока
-        for sprite_group in sprite_groups:
-            sprite_group.draw(self.screen)  # Отрисовка всех объектов кроме игрока и врагов
-        self.draw_enemies(enemies, self.screen)  # Отрисовка врагов
-        player.sprites()[0].draw_health_bar(self.screen)  # Отрисовка полосы здоровья игрока
+        objects_list. Все спрайты и полосы здоровья собираются в один список и рисуются одним вызовом Surface.blits.
+        Возвращает области экрана, на которых что-то было нарисовано (если они нужны способу вывода кадра)"""
+        # Очистка экрана (целиком или только областей, изменённых в прошлом кадре) или отрисовка фона
+        self.renderer.clear(self.screen, self.background if quality_settings["background"] else None)
+        # Игрок, все объекты кроме игрока и врагов, враги и их полосы здоровья, полоса здоровья игрока.
+        # Объекты, картинки которых не попадают на экран, не рисуются
+        dirty = []
+        if self.trails is not None:  # Следы рисуются под объектами
+            self.trails.draw(self.screen, dirty if self.renderer.tracks_dirty else None)
+        sprites = [sprite for sprite_group in (player, *sprite_groups, enemies) for sprite in sprite_group]
+        visible = [sprite for sprite in sprites if viewport.colliderect(sprite.rect.topleft, sprite.image.get_size())]
+        culling_stats["culled"] = len(sprites) - len(visible)
+        blit_sequence = [(sprite.image, sprite.rect) for sprite in visible]
+        if GLOW and quality_settings["glow"]:  # Ореолы пуль и взрывов прибавляются поверх их картинок
+            blit_sequence += [glow_cache.blit_item(sprite) for sprite in visible if getattr(sprite, "glow", False)]
+        blit_sequence += [enemy.health_bar() for enemy in enemies]
+        blit_sequence += [sprite.health_bar() for sprite in player]
+        dirty += self.screen.blits(blit_sequence, doreturn=self.renderer.tracks_dirty) or []
+        dirty += particles.draw(self.screen)
         if debug:  # Дебаг режим позволяет отобразить хитбоксы всех объектов в игре
-            pygame.draw.rect(self.screen, (255, 0, 0), self.starship.rect, 3)
-            for asteroid in self.asteroids.sprites():
-                pygame.draw.rect(self.screen, (0, 255, 0), asteroid.rect, 3)
-            for bullet in self.bullets.sprites():
-                pygame.draw.rect(self.screen, (0, 0, 255), bullet.rect, 3)
-            for enemy in self.enemies.sprites():
-                pygame.draw.rect(self.screen, (255, 0, 255), enemy.rect, 3)
-            for booster in self.boosters.sprites():
-                pygame.draw.rect(self.screen, (255, 255, 0), booster.rect, 3)
+            dirty.append(pygame.draw.rect(self.screen, (255, 0, 0), self.starship.rect, 3))
+            for sprites, color in ((self.asteroids, (0, 255, 0)), (self.bullets, (0, 0, 255)),
+                                   (self.enemies, (255, 0, 255)), (self.boosters, (255, 255, 0))):
+                dirty += [pygame.draw.rect(self.screen, color, sprite.rect, 3) for sprite in sprites]
+            dirty += [pygame.draw.circle(self.screen, (255, 128, 0), explosion.center, explosion.radius, 3)
+                      for explosion in self.explosions]
+            categories = [f'{"/".join(category)}: {stats["pairs"]} pairs, {stats["hits"]} hits, '
+                          f'{stats["time"]:.2f} ms' for category, stats in self.collision_stats["categories"].items()
+                          if stats["pairs"]]
+            lines = categories + [
+                f'Narrow checks: {self.collision_stats["narrow_checks"]}',
+                f'Skipped checks: {self.collision_stats["skipped_checks"]}',
+                f'HUD renders: {self.gui.render_stats["renders"]}, avoided: {self.gui.render_stats["avoided"]}',
+                f'Culled: {culling_stats["culled"]} sprites, {culling_stats["rotations_skipped"]} rotations',
+                f'Presented: {self.renderer.presented_area:.0%} of the screen',
+                f'Particles: {particles.count}']
+            if BATCHED_MASK_COLLISIONS:
+                lines.append(f'Mask batch: {self.collision_stats["mask_batch_time"]:.2f} ms')
+            if self.background is not None:
+                lines.append(f'Background: {self.background.draw_time:.2f} ms')
+            if self.governor is not None:
+                lines.append(f'Quality tier: {self.governor.tier}')
+            if self.gui.radar is not None:
+                lines.append(f'Radar: {self.gui.radar.refresh_time:.2f} ms')
+            dirty += self.gui.draw_debug_info(lines)
+        return dirty
 
     def handle_collisions(self):
         """Метод обрабатывает все столкновения в игре (кроме бустеров).
+        Столкновения обрабатываются в 3 этапа: сбор пар кандидатов за один проход по активным объектам,
+        точная проверка пар и вызов обработчиков из таблицы collision_handlers. Объекты уничтожаются только на
+        последнем этапе, поэтому группы не изменяются во время перебора.
         Возвращает True в случае столкновения, которое должно привести к концу игры, иначе False"""
-        # Обработка столкновений пуль
-        for bullet in self.bullets.sprites():
-            # Обработка выхода пуль за игровое поле
+        self.kill_offscreen_bullets()
+        # Количество проверок, которое потребовалось бы при переборе всех пар объектов
+        n_asteroids, n_enemies = len(self.asteroids), len(self.enemies)
+        n_enemy_bullets, n_boosters = len(self.enemy_bullets), len(self.boosters)
+        all_pairs = (len(self.bullets) * (n_asteroids + n_enemies) + n_enemy_bullets * (n_asteroids + 1) +
+                     len(self.explosions) * (n_asteroids + n_enemy_bullets + n_enemies + n_boosters) + n_asteroids)
+        category_stats = self.collision_stats["categories"] = {}
+        candidate_pairs = self.gather_candidate_pairs()
+        # Пары, проверяемые по битовым маскам, проверяются все вместе одной векторной операцией
+        mask_hits = {}
+        if BATCHED_MASK_COLLISIONS:
+            start_time = time.perf_counter()
+            mask_pairs = [pair for category, pairs in candidate_pairs.items()
+                          if self.collision_handlers[category][0] is collide_shapes
+                          for pair in pairs if pair_shape(*pair) == "mask"]
+            mask_hits = dict(zip(mask_pairs, batch_collide_masks(mask_pairs)))
+            self.collision_stats["mask_batch_time"] = (time.perf_counter() - start_time) * 1000
+        # Точная проверка пар. Попадания группируются по активному объекту: {категория: {объект: [цели]}}
+        all_hits = {}
+        for category, pairs in candidate_pairs.items():
+            start_time = time.perf_counter()
+            collide, _ = self.collision_handlers[category]
+            swept = category in self.swept_categories
+            hits = all_hits[category] = {}
+            for pair in pairs:
+                if collide is None:  # Пара уже проверена при сборе кандидатов
+                    hit = True
+                else:
+                    hit = mask_hits[pair] if pair in mask_hits else collide(*pair)
+                if hit or (swept and collide_along_path(*pair)):
+                    hits.setdefault(pair[0], []).append(pair[1])
+            category_stats[category] = {"pairs": len(pairs), "hits": sum(map(len, hits.values())),
+                                        "time": (time.perf_counter() - start_time) * 1000}
+        self.collision_stats["narrow_checks"] = sum(map(len, candidate_pairs.values()))
+        self.collision_stats["skipped_checks"] = all_pairs - self.collision_stats["narrow_checks"]
+        # Обработка попаданий
+        for category, hits in all_hits.items():
+            start_time = time.perf_counter()
+            _, handler = self.collision_handlers[category]
+            game_over = False
+            if category in self.area_categories:
+                # Все попадания взрывов обрабатываются одним вызовом
+                hits = {sprite: [target for target in targets if target.alive()] for sprite, targets in hits.items()}
+                if any(hits.values()):
+                    handler(hits)
+            else:
+                for sprite, targets in hits.items():
+                    # Цель могла быть уничтожена при обработке предыдущих попаданий
+                    targets = [target for target in targets if target.alive()]
+                    if targets and handler(sprite, targets):
+                        game_over = True
+                        break
+            category_stats[category]["time"] += (time.perf_counter() - start_time) * 1000
+            if game_over:
+                return True
+        return False
+
+    def kill_offscreen_bullets(self):
+        """Уничтожение пуль (игрока и врагов), вылетевших за игровое поле"""
+        for bullet in self.bullets.sprites() + self.enemy_bullets.sprites():
             if bullet.pos[0] > SCREEN_SIZE[0] or bullet.pos[1] > SCREEN_SIZE[1] or (bullet.pos < 0).any():
-                bullet.kill()  # Уничтожить пулю
-
-            # Обработка столкновений пуль с астероидами
-            # Детектирование столкновений. Здесь используются битовые маски объектов,
-            # данный подход снижает производительность, но обеспечивает максимально точное детектирование столкновений
-            hits = [ast for ast in self.asteroids if collide_mask(bullet, ast)]
-            if hits:
-                for asteroid in hits:
-                    fragments = asteroid.explode()  # Разбиваем астероид на осколки
-                    self.score += 1  # Начисляем очки игроку
-                    asteroid.kill()  # Уничтожаем начальный астероид
-                    self.asteroids.add(fragments)  # Вводим в игру осколки начального астероида
-                if bullet.type == "explosive":
-                    self.explosions.add(bullet.explode())  # Взрываем пулю, если она взрывающаяся
-                bullet.kill()  # Уничтожаем пулю
-
-            # Обработка столкновений пуль с врагами
-            hits = spritecollide(bullet, self.enemies, False)  # Детектирование столкновений
-            if hits:
-                for enemy in hits:
-                    if not enemy.damage():  # True если у врага осталось 0 HP, вызов метода damage наносит урон врагу
-                        self.score += enemy.score_gain  # Увеличиваем счёт за убийство
-                        enemy.kill()  # Уничтожаем врага
-                if bullet.type == "explosive":
-                    self.explosions.add(bullet.explode())
                 bullet.kill()
 
-        # Обработка столкновений вражеских пуль
-        for en_bullet in self.enemy_bullets.sprites():
-            # Обработка выхода вражеских пуль за игровое поле
-            if en_bullet.pos[0] > SCREEN_SIZE[0] or en_bullet.pos[1] > SCREEN_SIZE[1] or (en_bullet.pos < 0).any():
-                en_bullet.kill()
-
-            # Обработка столкновений вражеских пуль с астероидами
-            hits = [ast for ast in self.asteroids if collide_mask(en_bullet, ast)]
-            if hits:
-                for asteroid in hits:
-                    fragments = asteroid.explode()
-                    asteroid.kill()
-                    self.asteroids.add(fragments)
-                en_bullet.kill()
-
-            # Обработка столкновений вражеских пуль с игроком
-            if collide_mask(en_bullet, self.starship):  # Детектирование столкновения
-                if self.boosters_timeouts["Shield"] == 0 and self.starship.damage_animation_timeout == 0:
-                    # Нанести урон игроку + анимация попадания (во время нее игрок неуязвим)
-                    return self.starship.damage()
-
-        # Обработка столкновений с взрывами
-        for explosion in self.explosions.sprites():  # Перебор всех взрывов в игре на данный момент
-            hits = spritecollide(explosion, self.asteroids, dokill=True)  # Взрывы мгновенно разрушают любые астероиды
-            self.score += len(hits)
-            spritecollide(explosion, self.enemy_bullets, dokill=True)  # Взрывы разрушают вражеские пули
-            hits = spritecollide(explosion, self.enemies, dokill=False)  # Детектирование попаданий во врагов
-            if hits:
-                for enemy in hits:
-                    # True если у врага осталось 0 HP. -1/16 HP за каждый кадр контакта со взрывом
-                    if not enemy.damage(1 / 16):
-                        self.score += enemy.score_gain  # Начисление очков за убийство врага
-                        enemy.kill()  # Уничтожение врага
-            spritecollide(explosion, self.boosters, dokill=True)  # Взрывы разрушают не подобранные бустеры
-
-        # Обработка столкновений астероидов и игрока
-        hits = [ast for ast in self.asteroids if collide_mask(self.starship, ast)]  # Детектирование столкновения
-        if hits:
-            # Если бустер "Щит" активен
-            if self.boosters_timeouts["Shield"] > 0:
-                [ast.kill() for ast in hits]  # Мнгновенно уничтожить астероиды
-            # Если анимация попадания активна, то игрок неуязвим
-            elif self.starship.damage_animation_timeout != 0:
-                pass
-            else:
-                # Нанесение урона игроку + анимация попадания. Возвращает True если осталось 0 HP
-                return self.starship.damage()
+    def gather_candidate_pairs(self) -> Dict[Tuple[str, str], List[Tuple[Sprite, Sprite]]]:
+        """Сбор пар кандидатов на столкновение для всех категорий за один проход по активным объектам
+        (пулям, взрывам и игроку)"""
+        # Обновляем broadphase по текущим хитбоксам. Точные проверки будут выполняться только для соседей
+        self.broadphase.sync()
+        # Пары пуля-астероид из broadphase дополнительно отсеиваются одной векторной проверкой описанных окружностей
+        near_asteroids = self._bullet_asteroid_candidates()
+        # Цели всех взрывов находятся одним запросом к broadphase и одной векторной проверкой радиусов
+        explosion_targets = self._explosion_targets()
+        active_groups = {"bullets": self.bullets, "enemy_bullets": self.enemy_bullets,
+                         "explosions": self.explosions, "starship": [self.starship]}
+        pairs = {category: [] for category in self.collision_handlers}
+        for layer, sprite_group in active_groups.items():
+            categories = [category for category in pairs if category[0] == layer]
+            for sprite in sprite_group:
+                for category in categories:
+                    target_layer = category[1]
+                    if target_layer == "asteroids" and layer in ("bullets", "enemy_bullets"):
+                        targets = near_asteroids.get(sprite, ())
+                    elif layer == "explosions":
+                        targets = explosion_targets.get((sprite, target_layer), ())
+                    else:
+                        targets = self.broadphase.candidates(sprite, target_layer)
+                    pairs[category].extend((sprite, target) for target in targets)
+        return pairs
+
+    def _bullet_asteroid_candidates(self) -> Dict[Sprite, List[Sprite]]:
+        """Для каждой пули (игрока и врагов) возвращает астероиды, описанные окружности которых пересекаются с ней.
+        Проверяются только пары, хитбоксы которых пересекаются в broadphase, - все одной векторной операцией"""
+        pairs = [(bullet, asteroid) for bullets in (self.bullets, self.enemy_bullets) for bullet in bullets
+                 for asteroid in self.broadphase.candidates(bullet, "asteroids")]
+        candidates = {}
+        if not pairs:
+            return candidates
+        bullets, asteroids = zip(*pairs)
+        overlaps = swept_circle_overlaps if SWEPT_COLLISIONS else circle_overlaps
+        for i in np.flatnonzero(overlaps(bullets, asteroids)).tolist():
+            candidates.setdefault(bullets[i], []).append(asteroids[i])
+        return candidates
+
+    def _explosion_targets(self) -> Dict[Tuple[Sprite, str], List[Sprite]]:
+        """Для каждого взрыва и слоя целей возвращает цели, хитбоксы которых пересекаются с кругом взрыва.
+        Кандидаты берутся из broadphase, после чего все пары слоя проверяются одной векторной операцией"""
+        explosions = self.explosions.sprites()
+        centers = np.array([explosion.center for explosion in explosions], dtype=float).reshape(-1, 2)
+        radii = np.array([explosion.radius for explosion in explosions], dtype=float)
+        hits = {}
+        for _, layer in self.area_categories:
+            candidates = [self.broadphase.candidates(explosion, layer) for explosion in explosions]
+            targets = [target for explosion_targets in candidates for target in explosion_targets]
+            if not targets:
+                continue
+            owners = np.repeat(np.arange(len(explosions)), list(map(len, candidates)))  # Номер взрыва для каждой пары
+            rects = np.fromiter((value for target in targets for value in target.rect), dtype=float,
+                                count=4 * len(targets)).reshape(-1, 4)
+            hit = circle_rect_overlaps(centers[owners], radii[owners], rects)
+            for i, j in zip(owners[hit].tolist(), np.flatnonzero(hit).tolist()):
+                hits.setdefault((explosions[i], layer), []).append(targets[j])
+        return hits
+
+    def bullet_hits_asteroids(self, bullet: Sprite, asteroids: List[Sprite]):
+        """Попадание пули игрока в астероиды"""
+        for asteroid in asteroids:
+            fragments = asteroid.explode()  # Разбиваем астероид на осколки
+            self.score += 1  # Начисляем очки игроку
+            asteroid.kill()  # Уничтожаем начальный астероид
+            self.asteroids.add(fragments)  # Вводим в игру осколки начального астероида
+        if bullet.type == "explosive":
+            self.explosions.add(bullet.explode())  # Взрываем пулю, если она взрывающаяся
+        bullet.kill()  # Уничтожаем пулю
+
+    def bullet_hits_enemies(self, bullet: Sprite, enemies: List[Sprite]):
+        """Попадание пули игрока во врагов"""
+        for enemy in enemies:
+            if not enemy.damage():  # True если у врага осталось 0 HP, вызов метода damage наносит урон врагу
+                self.score += enemy.score_gain  # Увеличиваем счёт за убийство
+                enemy.kill()  # Уничтожаем врага
+        if bullet.type == "explosive":
+            self.explosions.add(bullet.explode())
+        bullet.kill()
+
+    def enemy_bullet_hits_asteroids(self, en_bullet: Sprite, asteroids: List[Sprite]):
+        """Попадание вражеской пули в астероиды (очки игроку не начисляются)"""
+        for asteroid in asteroids:
+            fragments = asteroid.explode()
+            asteroid.kill()
+            self.asteroids.add(fragments)
+        en_bullet.kill()
+
+    def enemy_bullet_hits_starship(self, en_bullet: Sprite, starship: List[Sprite]):
+        """Попадание вражеской пули в игрока. Возвращает True, если у игрока осталось 0 HP"""
+        if self.boosters_timeouts["Shield"] == 0 and self.starship.damage_animation_timeout == 0:
+            # Нанести урон игроку + анимация попадания (во время нее игрок неуязвим)
+            return self.starship.damage()
+        return False
+
+    @staticmethod
+    def _unique_targets(hits: Dict[Sprite, List[Sprite]]) -> List[Sprite]:
+        """Все цели, поражённые взрывами за кадр, без повторов"""
+        return list(dict.fromkeys(target for targets in hits.values() for target in targets))
+
+    def explosion_hits_asteroids(self, hits: Dict[Sprite, List[Sprite]]):
+        """Взрывы мгновенно разрушают любые астероиды"""
+        asteroids = self._unique_targets(hits)
+        for asteroid in asteroids:
+            asteroid.scatter_dust()
+            asteroid.kill()
+        self.score += len(asteroids)
+
+    def explosion_hits_bullets(self, hits: Dict[Sprite, List[Sprite]]):
+        """Взрывы разрушают вражеские пули"""
+        for en_bullet in self._unique_targets(hits):
+            en_bullet.kill()
+
+    def explosion_hits_enemies(self, hits: Dict[Sprite, List[Sprite]]):
+        """Взрывы наносят урон врагам за каждый кадр контакта с каждым взрывом.
+        Урон от всех взрывов за кадр суммируется, и каждый враг получает его за 1 вызов damage"""
+        enemies = self._unique_targets(hits)
+        index = {enemy: i for i, enemy in enumerate(enemies)}
+        contacts = np.bincount([index[enemy] for targets in hits.values() for enemy in targets],
+                               minlength=len(enemies))
+        for enemy, damage in zip(enemies, (contacts * EXPLOSION_DAMAGE).tolist()):
+            if not enemy.damage(damage):  # True если у врага осталось 0 HP
+                self.score += enemy.score_gain  # Начисление очков за убийство врага
+                enemy.kill()  # Уничтожение врага
+
+    def explosion_hits_boosters(self, hits: Dict[Sprite, List[Sprite]]):
+        """Взрывы разрушают не подобранные бустеры"""
+        for booster in self._unique_targets(hits):
+            booster.kill()
+
+    def starship_hits_asteroids(self, starship: Sprite, asteroids: List[Sprite]):
+        """Столкновение игрока с астероидами. Возвращает True, если у игрока осталось 0 HP"""
+        # Если бустер "Щит" активен
+        if self.boosters_timeouts["Shield"] > 0:
+            [ast.kill() for ast in asteroids]  # Мнгновенно уничтожить астероиды
+        # Если анимация попадания активна, то игрок неуязвим
+        elif self.starship.damage_animation_timeout != 0:
+            pass
+        else:
+            # Нанесение урона игроку + анимация попадания. Возвращает True если осталось 0 HP
+            return self.starship.damage()
         return False
 
     def cast_asteroid(self):
@@ -454,10 +1845,10 @@ class Game:
         """Обработчик бустера, дающего щит"""
         if mode == "activate":
             # При активации подменяем оригинальную картинку звездолёта на картинку с щитком
-            self.starship.original_image = pygame.image.load(os.path.join("images", "Starship_with_shield.png"))
+            self.starship.original_image = self.starship.shield_image
         elif mode == "deactivate":
             # При деактивации возвращаем исходную картинку на место
-            self.starship.original_image = pygame.image.load(os.path.join("images", "starship.png"))
+            self.starship.original_image = self.starship.starship_image
 
     # TODO. Переименовать метод, так как игра позволяет делать более 3 пуль. Например, "multiple_bullets"
     def triple_bullets(self, mode: str):
@@ -501,40 +1892,58 @@ class Game:
         clock = pygame.time.Clock()  # Ограничитель FPS
         while True:
             clock.tick(MAX_FPS)  # Ограничение FPS. Напрямую влияет на скорость игры. Рекомендованная величина - 60
+            frame_start = time.perf_counter()  # Время кадра для адаптивного качества (без ожидания clock.tick)
+            culling_stats["rotations_skipped"] = 0
             self.handle_events(frame)  # Обработка событий
             self.boosters_manager(frame)  # Обработка подбора и эффектов бустеров
             self.update_objects([self.starship, self.bullets])  # Перемещение игрока и пуль
+            if self.background is not None and quality_settings["background"]:
+                self.background.update(self.starship.speed)  # Сдвиг слоёв фона вслед за игроком
             # Если способность "стазис" активна, то обновления остальных объектов не происходит
             if not self.timed_abilities["Stasis"].active:
                 self.update_objects([self.enemy_bullets, self.asteroids, self.explosions])
+                particles.update()
+                if ASTEROID_PHYSICS:
+                    self.collide_asteroids()
                 self.update_enemies(self.enemies, self.starship)
+            if self.trails is not None:
+                self.trails.update(self.trail_colors)  # Запись новых положений в следы
             # Отрисовка всех объектов
-            self.draw(RenderPlain(self.starship), [self.boosters, self.bullets, self.enemy_bullets, self.asteroids,
-                                                   self.explosions], enemies=self.enemies, debug=False)
+            dirty = self.draw(self.player, [self.boosters, self.bullets, self.enemy_bullets, self.asteroids,
+                                            self.explosions], enemies=self.enemies, debug=DEBUG)
             # Обновление GUI
-            self.gui.update(self.score, self.weapon_type, self.weapons, self.timed_abilities)
-            pygame.display.update()
+            if self.gui.radar is not None:
+                self.gui.radar.update(frame, self.radar_colors)
+            dirty += self.gui.update(self.score, self.weapon_type, self.weapons, self.timed_abilities)
+            self.renderer.present(dirty)  # Вывод изменившейся части кадра на дисплей
             if self.handle_collisions():  # Обработка столкновений (если у игрока осталось 0 HP, то конеу игры)
                 self.gui.game_over()
                 return
+            # Смена ступени может убрать или вернуть фон, поэтому следующий кадр выводится целиком
+            if self.governor is not None and self.governor.record((time.perf_counter() - frame_start) * 1000, frame):
+                self.renderer.invalidate()
             frame += 1
 
 
 class Starship(Sprite):
     """Класс представляющий игрока"""
+    entity_type = "starship"  # Ключ формы объекта в collision_shapes
+    # Картинки загружаются 1 раз, чтобы их повёрнутые варианты можно было брать из кэша
+    starship_image = load_image(os.path.join("images", "starship.png"))
+    shield_image = load_image(os.path.join("images", "Starship_with_shield.png"))  # Картинка со щитом
 
     def __init__(self):
         pygame.sprite.Sprite.__init__(self)
         self.pos = np.array([SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2])  # Координаты центра игрока
-        self.original_image = pygame.image.load(os.path.join("images", "starship.png"))  # Неизменеямая картинка игрока
-        # Модель игрока при получении урона
-        self.damage_image = pygame.image.load(os.path.join("images", "starship_damage.png"))
-        self.to_transform_image = self.original_image
+        self.original_image = self.starship_image  # Неизменеямая картинка игрока
+        self.damaged = False  # Идёт анимация попадания (картинка окрашена в красный)
+        self.trail_slot = None  # Строка буфера следа в TrailPool
         self.image = self.original_image  # Отображаемая картинка
         # Битовая маска картинки (нужна для точных расчётов столкновений)
         self.mask = pygame.mask.from_surface(self.image)
         # Хитбокс объекта также нужен для расчёта столкновений
         self.rect = self.image.get_rect(center=self.pos)
+        self.angle = 0  # Угол поворота игрока
         self.speed = 0  # Скорость игрока
         self.max_hp = MAX_HP  # Максимальное количество очков здоровья (HP)
         self.hp = self.max_hp  # Текущее количество очков здоровья
@@ -549,10 +1958,10 @@ class Starship(Sprite):
     def animate_damage(self):
         """Анимация попадания в игрока пулей или астероидом"""
         if time.time() < self.damage_animation_timeout:  # Если время деактивации анимации ещё не наступило
-            self.to_transform_image = self.damage_image  # Подменим картинку игрока
+            self.damaged = True  # Картинка будет окрашена
         elif time.time() > self.damage_animation_timeout:  # Если пришло время деактивировать анимацию
             self.damage_animation_timeout = 0  # Обнуляем время деактивации
-            self.to_transform_image = self.original_image  # Возвращаем картинку обратно
+            self.damaged = False  # Возвращаем обычную картинку
 
     def damage(self, d: int = BASE_DAMAGE):
         """Наносит урон "d" игроку. Возвращает True при достижении 0 HP. Запускает анимацию попадания."""
@@ -561,21 +1970,22 @@ class Starship(Sprite):
         self.damage_animation_timeout = time.time() + INVULNERABILITY_PERIOD
         return self.hp <= 0
 
-    def draw_health_bar(self, screen: pygame.Surface):
-        """Отрисовка полосы здоровья игрока"""
+    def health_bar(self) -> Tuple[pygame.Surface, Tuple, pygame.Rect]:
+        """Полоса здоровья игрока (элемент списка для Surface.blits)"""
         # Расчёт ширины полосы как доли текущего здоровья от максимального.
         current_width = (self.original_image.get_width() + 10) / self.max_hp * self.hp
-        pygame.draw.rect(screen, (0, 200, 0), [*self.rect.topleft, current_width, 5])  # Отрисовка прямоугольника
+        return health_bar((0, 200, 0), self.rect.topleft, current_width, 5)
 
     def move(self):
         """Перемещение игрока к курсору мыши. Чем дальше курсор находится от игрока, тем выше скорость передвижения"""
-        mouse_pos = np.array(pygame.mouse.get_pos())  # Получение координат курсора
+        mouse_pos = np.array(cursor_pos())  # Получение координат курсора
         direction = mouse_pos - self.pos  # Вычисление вектора направления
-        angle = self._calculate_angle(mouse_pos)  # Расчёт угла поворота к курсору
+        self.angle = self._calculate_angle(mouse_pos)  # Расчёт угла поворота к курсору
         self.speed = direction / SHIP_SPEED  # Расчёт вектора скорости (нормализация вектора направления)
         self.pos += self.speed  # Изменение координат игрока в соответствии с вектором скорости
-        self.image = pygame.transform.rotate(self.to_transform_image, int(angle))  # Поворот изображения игрока
-        self.mask = pygame.mask.from_surface(self.image)  # Обновление битовой маски в связи с поворотом картинки
+        # Поворот изображения игрока и его битовой маски (берутся из кэша)
+        rotated = rotation_cache.get(self.original_image, self.angle, self.damaged)
+        self.image, self.mask = rotated.image, rotated.mask
         self.rect = self.image.get_rect(center=self.pos)  # Обновление хитбокса в связи с появлением нового центра
 
     def _calculate_angle(self, mouse_pos: np.ndarray):
@@ -609,7 +2019,6 @@ class EnemyType:
     type_: str  # Название типа
     strength: str  # Сила. Принимает значения "boss" или "normal"
     original_image: pygame.Surface
-    damage_image: pygame.Surface
     rel_speed: float  # Модификатор скорости
     hitbox: Tuple[int, int]  # Размеры хитбокса
     hp: int  # Количество очков здоровья
@@ -620,21 +2029,18 @@ class EnemyType:
 
 class Enemy(Starship):
     """Класс представляющий врага, наследуется от Starship, так как имеет очень сходное поведение"""
+    entity_type = "enemy"
     # Описание возможных вариантов врагов
-    variants = [EnemyType(type_="type_1", original_image=pygame.image.load(os.path.join("images", "enemy_1.png")),
-                          damage_image=pygame.image.load(os.path.join("images", "enemy_1_damage.png")),
+    variants = [EnemyType(type_="type_1", original_image=load_image(os.path.join("images", "enemy_1.png")),
                           hitbox=(35, 40), hp=3, fire_rate=1.5, max_bullets=1, rel_speed=1, score_gain=2,
                           strength="normal"),
-                EnemyType(type_="type_2", original_image=pygame.image.load(os.path.join("images", "enemy_2.png")),
-                          damage_image=pygame.image.load(os.path.join("images", "enemy_2_damage.png")),
+                EnemyType(type_="type_2", original_image=load_image(os.path.join("images", "enemy_2.png")),
                           hitbox=(80, 80), hp=30, fire_rate=2, max_bullets=7, rel_speed=0.5, score_gain=10,
                           strength="boss"),
-                EnemyType(type_="type_3", original_image=pygame.image.load(os.path.join("images", "enemy_3.png")),
-                          damage_image=pygame.image.load(os.path.join("images", "enemy_3_damage.png")),
+                EnemyType(type_="type_3", original_image=load_image(os.path.join("images", "enemy_3.png")),
                           hitbox=(20, 20), hp=1, fire_rate=2, max_bullets=1, rel_speed=2, score_gain=1,
                           strength="normal"),
-                EnemyType(type_="type_4", original_image=pygame.image.load(os.path.join("images", "enemy_4.png")),
-                          damage_image=pygame.image.load(os.path.join("images", "enemy_4_damage.png")),
+                EnemyType(type_="type_4", original_image=load_image(os.path.join("images", "enemy_4.png")),
                           hitbox=(40, 40), hp=5, fire_rate=0.5, max_bullets=1, rel_speed=1, score_gain=10,
                           strength="boss")
                 ]
@@ -653,8 +2059,6 @@ class Enemy(Starship):
         self.strength = strength
         self.type = enemy_type.type_
         self.original_image = enemy_type.original_image
-        self.damage_image = enemy_type.damage_image
-        self.to_transform_image = self.original_image
         self.w, self.h = enemy_type.hitbox
         self.rel_speed = enemy_type.rel_speed
         self.max_hp = enemy_type.hp
@@ -679,16 +2083,11 @@ class Enemy(Starship):
         self.move(player)
 
     def rotate(self, player: pygame.sprite.Sprite):
-        angle = self._calculate_angle(player.pos)
-        self.image = pygame.transform.rotate(self.to_transform_image, int(angle))
-        self.mask = pygame.mask.from_surface(self.image)
-
-    def animate_damage(self):
-        if time.time() < self.damage_animation_timeout:
-            self.to_transform_image = self.damage_image
-        elif time.time() > self.damage_animation_timeout:
-            self.damage_animation_timeout = 0
-            self.to_transform_image = self.original_image
+        self.angle = self._calculate_angle(player.pos)
+        if rotation_culled(self):  # Картинка невидимого врага будет повёрнута, когда он появится на экране
+            return
+        rotated = rotation_cache.get(self.original_image, self.angle, self.damaged)
+        self.image, self.mask = rotated.image, rotated.mask
 
     def move(self, player: pygame.sprite.Sprite):
         direction = player.pos - self.pos  # Враг движется к игроку, а не к курсору
@@ -705,16 +2104,14 @@ class Enemy(Starship):
             self.kill_sound.play()
             return status
 
-    def draw_health_bar(self, screen: pygame.Surface):
-        """Отрисовка полосы здоровья, отличается у обычных врагов и боссов"""
-        screen_size = screen.get_size()
+    def health_bar(self) -> Tuple[pygame.Surface, Tuple, pygame.Rect]:
+        """Полоса здоровья (элемент списка для Surface.blits), отличается у обычных врагов и боссов"""
         if self.strength == "boss":
             # У боссов полоса здоровья занимает почти всё ширину экрана сверху
-            current_width = (screen_size[0] - 20) / self.max_hp * self.hp
-            pygame.draw.rect(screen, (200, 0, 0), [10, 10, current_width, 20])
-        elif self.strength == "normal":
-            current_width = (self.w + 10) / self.max_hp * self.hp
-            pygame.draw.rect(screen, (200, 0, 0), [*self.rect.topleft, current_width, 5])
+            current_width = (SCREEN_SIZE[0] - 20) / self.max_hp * self.hp
+            return health_bar((200, 0, 0), (10, 10), current_width, 20)
+        current_width = (self.w + 10) / self.max_hp * self.hp
+        return health_bar((200, 0, 0), self.rect.topleft, current_width, 5)
 
 
 @dataclass
@@ -730,9 +2127,11 @@ class BulletType:
 
 class Bullet(Sprite):
     """Класс на основе которого создаётся объекты пуль"""
+    entity_type = "bullet"
+    glow = True  # Пули светятся (см. GlowCache)
     # Объектов класса Bullet будет создаваться довольно много, поэтому мы хотим загрузить картинку только 1 раз
     # Возможные варианты типов пуль
-    bullet_types = {"normal": BulletType("normal", pygame.image.load(os.path.join("images", "bullet.png")),
+    bullet_types = {"normal": BulletType("normal", load_image(os.path.join("images", "bullet.png")),
                                          [pygame.mixer.Sound(os.path.join("sounds", "blaster_short_1.wav")),
                                           pygame.mixer.Sound(os.path.join("sounds", "blaster_short_2.wav")),
                                           pygame.mixer.Sound(os.path.join("sounds", "blaster_short_3.wav"))],
@@ -740,7 +2139,7 @@ class Bullet(Sprite):
                                           pygame.mixer.Sound(os.path.join("sounds", "blaster_short_5.wav"))],
                                          [None], [None]),
                     "explosive": BulletType("explosive",
-                                            pygame.image.load(os.path.join("images", "powered_bullet.png")),
+                                            load_image(os.path.join("images", "powered_bullet.png")),
                                             [pygame.mixer.Sound(os.path.join("sounds", "explosive_bullet_1.wav")),
                                              pygame.mixer.Sound(os.path.join("sounds", "explosive_bullet_2.wav"))],
                                             [pygame.mixer.Sound(os.path.join("sounds", "explosive_bullet_1.wav")),
@@ -764,9 +2163,13 @@ class Bullet(Sprite):
         self.speed = self.direction / max(abs(self.direction)) * rel_speed
         self.angle = self._calculate_angle(target_pos) - angle_offset  # Расчёт угла поворота
         # Поворот картинки (так как пуля летит прямо, мы делаем это только 1 раз)
-        self.image = pygame.transform.rotate(self.original_image, int(self.angle))
-        self.mask = pygame.mask.from_surface(self.image)
+        rotated = rotation_cache.get(self.original_image, self.angle)
+        self.image, self.mask = rotated.image, rotated.mask
         self.rect = self.image.get_rect(center=self.pos)
+        self.prev_pos = self.pos.copy()  # Координаты центра пули на предыдущем кадре
+        self.swept_rect = self.rect  # Прямоугольник, охватывающий путь пули за последний кадр
+        self.trail_slot = None  # Строка буфера следа в TrailPool
+        self.radius = bounding_radius(self.original_image)  # Радиус описанной окружности
         self.launch_sound = random.choice(self.setup.launch_sounds)
         self.enemy_launch_sound = random.choice(self.setup.enemy_launch_sounds)
         self.hit_sound = random.choice(self.setup.hit_sounds)
@@ -776,12 +2179,15 @@ class Bullet(Sprite):
         self.move()
 
     def move(self):
+        self.prev_pos[:] = self.pos
         self.pos += self.speed
         self.rect = self.image.get_rect(center=self.pos)
+        self.swept_rect = self.rect.union(self.image.get_rect(center=self.prev_pos))
 
     def explode(self):
         """Взрывает пулю и возвращает объект взрыва"""
         self.explosion_sound.play()
+        particles.emit(self.pos, EXPLOSION_SPARKS, speed=(2, 8), life=(10, 30), color=(255, 180, 60))  # Искры
         return ExplosionAnimation(self.pos.copy())
 
     def _calculate_angle(self, target_pos: np.ndarray):
@@ -792,19 +2198,24 @@ class Bullet(Sprite):
 
 class Asteroid(Sprite):
     """Класс для создания объектов астероидов"""
+    entity_type = "asteroid"
     # Оригинальные картинки астероидов
-    ast_variants = [("small", pygame.image.load(os.path.join("images", "ast1_small.png"))),
-                    ("small", pygame.image.load(os.path.join("images", "ast2_small.png"))),
-                    ("small", pygame.image.load(os.path.join("images", "ast3_small.png"))),
-                    ("small", pygame.image.load(os.path.join("images", "ast4_small.png"))),
-                    ("medium", pygame.image.load(os.path.join("images", "ast1_medium.png"))),
-                    ("medium", pygame.image.load(os.path.join("images", "ast2_medium.png"))),
-                    ("medium", pygame.image.load(os.path.join("images", "ast3_medium.png"))),
-                    ("medium", pygame.image.load(os.path.join("images", "ast4_medium.png"))),
-                    ("large", pygame.image.load(os.path.join("images", "ast1_large.png"))),
-                    ("large", pygame.image.load(os.path.join("images", "ast2_large.png"))),
-                    ("large", pygame.image.load(os.path.join("images", "ast3_large.png"))),
-                    ("large", pygame.image.load(os.path.join("images", "ast4_large.png")))]
+    ast_variants = [("small", load_image(os.path.join("images", "ast1_small.png"))),
+                    ("small", load_image(os.path.join("images", "ast2_small.png"))),
+                    ("small", load_image(os.path.join("images", "ast3_small.png"))),
+                    ("small", load_image(os.path.join("images", "ast4_small.png"))),
+                    ("medium", load_image(os.path.join("images", "ast1_medium.png"))),
+                    ("medium", load_image(os.path.join("images", "ast2_medium.png"))),
+                    ("medium", load_image(os.path.join("images", "ast3_medium.png"))),
+                    ("medium", load_image(os.path.join("images", "ast4_medium.png"))),
+                    ("large", load_image(os.path.join("images", "ast1_large.png"))),
+                    ("large", load_image(os.path.join("images", "ast2_large.png"))),
+                    ("large", load_image(os.path.join("images", "ast3_large.png"))),
+                    ("large", load_image(os.path.join("images", "ast4_large.png")))]
+    # Радиусы описанных окружностей для каждого типа астероидов (по самой большой картинке типа)
+    # (картинки перебираются по возрастанию радиуса, поэтому в словаре остаётся максимальный)
+    radii = {ast_type: bounding_radius(image)
+             for ast_type, image in sorted(ast_variants, key=lambda variant: bounding_radius(variant[1]))}
 
     def __init__(self, pos: np.ndarray = None, speed: np.ndarray = None, ast_type: str = None):
         pygame.sprite.Sprite.__init__(self)
@@ -813,6 +2224,8 @@ class Asteroid(Sprite):
             self.init_asteroid_fragment(pos, speed, ast_type)  # ...инициализировать осколок
         else:  # Иначе (координаты, скорость и тип НЕ заданы)...
             self.init_rand_asteroid()  # ...инициализировать обычный астероид
+        self.radius = self.radii[self.type]  # Радиус описанной окружности (для быстрого отбора столкновений)
+        self.body_radius = polygon_cache.radius(self.original_image)  # Радиус астероида в режиме физики
         self.angle = 0  # Угол поворота астероида
         self.angle_inc = random.uniform(-2, 2)  # Величина изменения угла поворота астероида
         self.explosion_sound = pygame.mixer.Sound(os.path.join("sounds", "explosion_1.wav"))  # Звук взрыва астероидов
@@ -840,7 +2253,7 @@ class Asteroid(Sprite):
                                   self._right_pos, self._bottom_pos])()
         # Получаем хитбокс с заданными размерами
         self.rect = self.image.get_rect(center=self.pos)
-        self.direction = pygame.mouse.get_pos() - self.pos  # Вычисляем направление
+        self.direction = cursor_pos() - self.pos  # Вычисляем направление
         self.speed = self.direction / ASTEROID_SPEED  # Расчитываем скорость
 
     @staticmethod
@@ -899,8 +2312,14 @@ class Asteroid(Sprite):
         self.move()
 
     def rotate(self):
+        if not quality_settings["asteroid_spin"]:  # На низкой ступени качества астероиды не вращаются
+            return
         self.angle += self.angle_inc
-        self.image = pygame.transform.rotate(self.original_image, self.angle)
+        if rotation_culled(self):  # Картинка невидимого астероида будет повёрнута, когда он появится на экране
+            return
+        # Маска обновляется вместе с картинкой, иначе столкновения считались бы по неповёрнутому контуру
+        rotated = rotation_cache.get(self.original_image, self.angle)
+        self.image, self.mask = rotated.image, rotated.mask
 
     def move(self):
         self.pos += self.speed
@@ -921,9 +2340,14 @@ class Asteroid(Sprite):
                 fragments.append(Asteroid(pos, speed, "small"))  # Передаём их в конструктор астероида
         if self.type == "small":  # Если астероид маленький...
             pass  # ...не делать ничего
+        self.scatter_dust()
         self.explosion_sound.play()  # Воспроизвести звук взрыва астероида
         return fragments
 
+    def scatter_dust(self):
+        """Облако пыли на месте разрушенного астероида (чем больше астероид, тем больше пыли)"""
+        particles.emit(self.pos, ASTEROID_DUST[self.type], speed=(0.5, 3), life=(20, 60), color=(150, 135, 120))
+
 
 @dataclass
 class BoosterType:
@@ -938,19 +2362,19 @@ class Booster(Sprite):
     связаны с объектами данного класса и будут описаны внутри класса Game """
     # Типы возможных бустеров и их картинки
     booster_types = {
-        "Rapid_fire": BoosterType("Rapid_fire", pygame.image.load(os.path.join("images", "Rapid_fire.png")),
+        "Rapid_fire": BoosterType("Rapid_fire", load_image(os.path.join("images", "Rapid_fire.png")),
                                   pygame.mixer.Sound(os.path.join("sounds", "booster_1.wav"))),
-        "Shield": BoosterType("Shield", pygame.image.load(os.path.join("images", "Shield.png")),
+        "Shield": BoosterType("Shield", load_image(os.path.join("images", "Shield.png")),
                               pygame.mixer.Sound(os.path.join("sounds", "booster_1.wav"))),
         "Triple_bullets": BoosterType("Triple_bullets",
-                                      pygame.image.load(os.path.join("images", "Triple_bullets.png")),
+                                      load_image(os.path.join("images", "Triple_bullets.png")),
                                       pygame.mixer.Sound(os.path.join("sounds", "booster_1.wav"))),
         "Explosive_bullets": BoosterType("Explosive_bullets",
-                                         pygame.image.load(os.path.join("images", "Explosive_bullets.png")),
+                                         load_image(os.path.join("images", "Explosive_bullets.png")),
                                          pygame.mixer.Sound(os.path.join("sounds", "booster_ammo.wav"))),
-        "Health": BoosterType("Health", pygame.image.load(os.path.join("images", "health.png")),
+        "Health": BoosterType("Health", load_image(os.path.join("images", "health.png")),
                               pygame.mixer.Sound(os.path.join("sounds", "heal_1.wav"))),
-        "Stasis": BoosterType("Stasis", pygame.image.load(os.path.join("images", "Stasis.png")),
+        "Stasis": BoosterType("Stasis", load_image(os.path.join("images", "Stasis.png")),
                               pygame.mixer.Sound(os.path.join("sounds", "booster_1.wav")))}
 
     def __init__(self):
@@ -970,17 +2394,21 @@ class Booster(Sprite):
 
 class ExplosionAnimation(Sprite):
     """Класс для создания анимаций взрыва пуль.
-    Изображения для анимации сохранены в отдельной папке и все загружаются в атрибут "original_images" """
-    original_images = [pygame.image.load(os.path.join("images", "explosion_animation", file)) for file in
+    Изображения для анимации сохранены в отдельной папке и все загружаются в атрибут "original_images".
+    Для столкновений взрыв считается кругом, радиус которого растёт вместе с анимацией"""
+    original_images = [load_image(os.path.join("images", "explosion_animation", file)) for file in
                        sorted(os.listdir(os.path.join("images", "explosion_animation")))]
 
+    radii = [visible_radius(image) for image in original_images]  # Радиус взрыва на каждом кадре анимации
+    glow = True  # Взрывы светятся (см. GlowCache)
+
     def __init__(self, center: np.ndarray):
         Sprite.__init__(self)
         self.center = center
         self.current_idx = 0  # Текущий кадр анимации
         self.image = self.original_images[self.current_idx]  # Изображение текущего кадра
         self.rect = self.image.get_rect(center=center)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.radius = self.radii[self.current_idx]
 
     def update(self):
         """Обновление анимации"""
@@ -988,12 +2416,13 @@ class ExplosionAnimation(Sprite):
         if self.current_idx < len(self.original_images):  # Если анимация ещё не закончилась
             self.image = self.original_images[self.current_idx]  # Получаем новое изображение
             self.rect = self.image.get_rect(center=self.center)  # Получаем новый хитбокс
-            self.mask = pygame.mask.from_surface(self.image)  # Получаем новую битовую маску
+            self.radius = self.radii[self.current_idx]  # Радиус взрыва на новом кадре
         else:  # Если анимация закончилась
             self.kill()  # Удалить её
 
 
-# Межигровой цикл. Каждая итерация цикла соответствует одной завершённой игре (т.е. состоянием "game over")
-while True:
-    game = Game(game_screen)  # Создание и запуск игры
-    game.run()
+if __name__ == "__main__":
+    # Межигровой цикл. Каждая итерация цикла соответствует одной завершённой игре (т.е. состоянием "game over")
+    while True:
+        game = Game(game_screen)  # Создание и запуск игры
+        game.run()